@@ -12,9 +12,21 @@ load_dotenv()
 XAI_API_KEY = os.getenv("XAI_API_KEY")
 XAI_BASE_URL = "https://api.x.ai/v1"
 
+# LLM throttling (see app/llm_client.py) — keep parallel analysis under the provider's limits
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))   # Calls in flight at once
+LLM_RPM = int(os.getenv("LLM_RPM", "0"))                           # Requests per minute, 0 = no cap
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))           # Retries on 429 / 5xx / network errors
+
 # Dashboard credentials
 DASHBOARD_USERNAME = os.getenv("DASHBOARD_USERNAME", "admin")
 DASHBOARD_PASSWORD = os.getenv("DASHBOARD_PASSWORD", "changeme123")
 
 # Database path — each app gets its own SQLite file inside this folder
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "processed")
+
+# Cached LLM responses, shared by all apps (see app/llm_cache.py)
+LLM_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cache", "llm_cache.db")
+
+# Optional local theme clustering for very large months (see app/theme_clustering.py).
+# Needs the extra packages sentence-transformers and hdbscan.
+THEME_CLUSTERING = os.getenv("THEME_CLUSTERING", "false").lower() == "true"
@@ -5,32 +5,29 @@ Built by Sudhakar.G
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-import json
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 
 import sys
 import os
+import time
+import html
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from app.config import DASHBOARD_USERNAME, DASHBOARD_PASSWORD
 from app.database import (
-    initialize_database, store_reviews, get_metadata,
-    get_all_period_analyses, get_themes_for_period, get_reviews_for_period,
-    count_reviews_for_period, count_unanalyzed_reviews, get_review_date_range,
+    initialize_database, store_reviews, get_metadata, get_app_summary,
+    get_all_period_analyses, get_themes_for_period, get_themes_for_periods, get_reviews_for_period,
+    count_reviews_for_period, count_reviews_by_month, count_unanalyzed_reviews,
+    get_existing_review_ids,
     list_analyzed_apps, delete_app_data, delete_analysis_only,
     get_last_scraped_date, get_analyzed_months,
     aggregate_themes_from_monthly, store_themes,
 )
-from app.scraper import scrape_google_play, scrape_apple_app_store
 from app.processor import (
     run_analysis, get_month_ranges, get_quarter_ranges, get_year_ranges,
     process_period, process_period_stats_only,
 )
-from app.llm_client import call_llm
+from app.llm_client import call_llm_stream
 
 # ============================================================
 # PAGE CONFIG
@@ -124,11 +121,19 @@ hr { border-color: var(--border); }
 
 /* Alert boxes */
 .stSuccess, .stInfo, .stWarning { border-radius: 10px; }
+
+/* App header */
+.app-header { display: flex; align-items: center; gap: 10px; margin-bottom: 0.2rem; }
+.app-header .mark { font-size: 1.3rem; color: #d97757; }
+.app-header .name { font-size: 1.3rem; font-weight: 700; color: #e8e0d5; }
+.app-header .tag { color: #6b6560; font-size: 0.8rem; margin-left: auto; }
 </style>
 """
 
-# Apply CSS globally — runs on EVERY rerender regardless of page state
-st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+# Apply CSS globally. st.html sends a style-only block straight to the page
+# without taking layout space or going through the markdown renderer.
+# It still has to run on every rerun: Streamlit drops elements a run doesn't emit.
+st.html(CUSTOM_CSS)
 
 
 def apply_chart_style(fig):
@@ -163,6 +168,7 @@ def _check_auth() -> bool:
 
 def _clear_app_state():
     """Clear all app-specific session state when switching apps."""
+    _clear_data_caches()
     keys_to_clear = [
         "chat_history", "last_period_count",
         "pos_filter", "neg_filter",
@@ -174,6 +180,86 @@ def _clear_app_state():
         st.session_state.pop(k, None)
 
 
+# ============================================================
+# CACHED READS
+# ============================================================
+# Every widget interaction reruns the whole script. These wrappers keep
+# recent DB reads in memory so a rerun doesn't re-query SQLite for the same rows.
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_analyses(app_id, period_type):
+    return get_all_period_analyses(app_id, period_type=period_type)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_analyses_df(app_id, period_type):
+    """Period analyses as one DataFrame (one column per field), shared by the dashboard tab."""
+    import pandas as pd
+
+    analyses = _cached_analyses(app_id, period_type)
+    if not analyses:
+        return pd.DataFrame()
+    return pd.DataFrame(analyses).sort_values("period_start").reset_index(drop=True)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_themes(app_id, period_type, period_label):
+    return get_themes_for_period(app_id, period_type, period_label)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_themes_for_periods(app_id, period_type, period_labels):
+    return get_themes_for_periods(app_id, period_type, list(period_labels))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_app_list():
+    return list_analyzed_apps()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_app_summary(app_id):
+    """Metadata plus review date range — shared by the sidebar, header and manage tab."""
+    return get_app_summary(app_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_period_count(app_id, sd_str, ed_str):
+    return count_reviews_for_period(app_id, sd_str, ed_str)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_month_counts(app_id, sd_str, ed_str):
+    return count_reviews_by_month(app_id, sd_str, ed_str)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_last_scraped(app_id):
+    return get_last_scraped_date(app_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_analyzed_months(app_id):
+    return get_analyzed_months(app_id)
+
+def _themes_by_sentiment(theme_rows, fmt):
+    """
+    One pass over multi-period theme rows → ({period_label: [...]}, {period_label: [...]})
+    for positive and negative themes, each entry formatted with fmt(row).
+    """
+    pos, neg = {}, {}
+    for t in theme_rows:
+        if t["sentiment"] == "positive":
+            pos.setdefault(t["period_label"], []).append(fmt(t))
+        elif t["sentiment"] == "negative":
+            neg.setdefault(t["period_label"], []).append(fmt(t))
+    return pos, neg
+
+def _clear_data_caches():
+    """Drop cached reads — call after anything writes to the database."""
+    _cached_analyses.clear()
+    _cached_analyses_df.clear()
+    _cached_themes.clear()
+    _cached_themes_for_periods.clear()
+    _cached_app_list.clear()
+    _cached_app_summary.clear()
+    _cached_period_count.clear()
+    _cached_month_counts.clear()
+    _cached_last_scraped.clear()
+    _cached_analyzed_months.clear()
+    _build_chat_context.clear()
+
+
 # ============================================================
 # LOGIN
 # ============================================================
@@ -220,7 +306,7 @@ def render_sidebar():
     </div>""", unsafe_allow_html=True)
     st.sidebar.markdown("---")
 
-    existing_apps = list_analyzed_apps()
+    existing_apps = _cached_app_list()
     app_name_input = ""
     store = "Google Play Store"
 
@@ -267,6 +353,7 @@ def render_sidebar():
                 store_code = "google_play" if store == "Google Play Store" else "apple_app_store"
                 name_for_init = app_name_input if app_name_input else app_id
                 initialize_database(app_id, name_for_init, store_code)
+                _clear_data_caches()
                 st.sidebar.success(f"**{name_for_init}** added!")
                 st.rerun()
     else:
@@ -275,12 +362,12 @@ def render_sidebar():
 
     # App status summary
     st.sidebar.markdown("---")
-    meta = get_metadata(app_id)
+    meta = _cached_app_summary(app_id)
+    min_d, max_d = meta.get("min_review_date"), meta.get("max_review_date")
     if meta and meta.get("app_name"):
         st.sidebar.markdown(f"**{meta['app_name']}**")
         total_in_db = meta.get("total_reviews_stored", "0")
         last_analyzed = meta.get("last_analyzed_date", "Never")
-        min_d, max_d = get_review_date_range(app_id)
         st.sidebar.caption(f"Reviews in DB: **{total_in_db}**")
         st.sidebar.caption(f"Last analyzed: **{last_analyzed}**")
         if min_d and max_d:
@@ -302,23 +389,30 @@ def render_sidebar():
 # ============================================================
 # CHARTS
 # ============================================================
-def chart_rating_distribution(analyses):
-    if not analyses: return
-    totals = {s: sum(a.get(f"rating_{s}", 0) for a in analyses) for s in range(1, 6)}
-    total = sum(totals.values())
+# Per-star count columns of period_analysis, 1★ to 5★ — built once instead of
+# formatting f"rating_{s}" on every chart render.
+_RATING_COLUMNS = ("rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
+
+# Figure builders are cached on the DataFrame's contents: tab switches and unrelated
+# widget changes rerun the script, but hand back the already-built figure.
+@st.cache_data(show_spinner=False, max_entries=16)
+def _fig_rating_distribution(df):
+    import plotly.graph_objects as go
+    # One column-wise pass over the five star columns
+    totals = df[list(_RATING_COLUMNS)].sum().tolist()
+    total = sum(totals)
     fig = go.Figure(go.Bar(
-        x=[f"{s}★" for s in range(1, 6)], y=[totals[s] for s in range(1, 6)],
+        x=[f"{s}★" for s in range(1, 6)], y=totals,
         marker_color=["#c45c4a", "#d97757", "#c9a85c", "#8aad6e", "#5a9e6f"],
-        text=[totals[s] for s in range(1, 6)], textposition="outside",
+        text=totals, textposition="outside",
         textfont=dict(color="#9c9588", size=11),
     ))
     fig.update_layout(title=f"Rating distribution ({total:,} reviews)", height=370, yaxis_title="Count", xaxis_title="")
-    apply_chart_style(fig)
-    st.plotly_chart(fig, use_container_width=True)
+    return apply_chart_style(fig)
 
-def chart_rating_trend(analyses):
-    if len(analyses) < 2: return
-    df = pd.DataFrame(analyses).sort_values("period_start")
+@st.cache_data(show_spinner=False, max_entries=16)
+def _fig_rating_trend(df):
+    import plotly.graph_objects as go
     fig = go.Figure(go.Scatter(
         x=df["period_label"], y=df["avg_rating"], mode="lines+markers+text",
         text=[f"{v:.1f}" for v in df["avg_rating"]], textposition="top center",
@@ -327,90 +421,184 @@ def chart_rating_trend(analyses):
         marker=dict(size=7, color="#d97757", line=dict(width=2, color="#2d2b26")),
     ))
     fig.update_layout(title="Average rating trend", height=370, yaxis_range=[1, 5], yaxis_title="Rating")
-    apply_chart_style(fig)
-    st.plotly_chart(fig, use_container_width=True)
+    return apply_chart_style(fig)
 
-def chart_star_breakdown(analyses):
-    if len(analyses) < 2: return
-    df = pd.DataFrame(analyses).sort_values("period_start")
+@st.cache_data(show_spinner=False, max_entries=16)
+def _fig_star_breakdown(df):
+    import plotly.graph_objects as go
     colors = {"1":"#c45c4a","2":"#d97757","3":"#c9a85c","4":"#8aad6e","5":"#5a9e6f"}
     fig = go.Figure()
-    for s in range(1, 6):
-        fig.add_trace(go.Scatter(x=df["period_label"], y=df[f"rating_{s}"], mode="lines+markers",
+    for s, col in enumerate(_RATING_COLUMNS, start=1):
+        fig.add_trace(go.Scatter(x=df["period_label"], y=df[col], mode="lines+markers",
             name=f"{s}★", line=dict(color=colors[str(s)], width=2, shape="spline"), marker=dict(size=4)))
     fig.update_layout(title="Star rating breakdown", height=400, yaxis_title="Reviews",
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5))
-    apply_chart_style(fig)
-    st.plotly_chart(fig, use_container_width=True)
+    return apply_chart_style(fig)
 
-def chart_volume(analyses):
-    if len(analyses) < 2: return
-    df = pd.DataFrame(analyses).sort_values("period_start")
+@st.cache_data(show_spinner=False, max_entries=16)
+def _fig_volume(df):
+    import plotly.graph_objects as go
     fig = go.Figure(go.Bar(x=df["period_label"], y=df["total_reviews"], marker_color="#b8856c",
         text=df["total_reviews"], textposition="outside", textfont=dict(color="#9c9588", size=9)))
     fig.update_layout(title="Review volume", height=340, yaxis_title="Reviews")
-    apply_chart_style(fig)
-    st.plotly_chart(fig, use_container_width=True)
+    return apply_chart_style(fig)
+
+# Stable keys: the browser keeps the same chart component across reruns and only
+# swaps in the new figure, instead of tearing it down and mounting a new one.
+# (Skipping st.plotly_chart on an unchanged rerun isn't an option — Streamlit drops
+# any element a rerun doesn't draw.)
+def chart_rating_distribution(df):
+    if df.empty: return
+    st.plotly_chart(_fig_rating_distribution(df), use_container_width=True, key="chart_rating_distribution")
+
+def chart_rating_trend(df):
+    if len(df) < 2: return
+    st.plotly_chart(_fig_rating_trend(df), use_container_width=True, key="chart_rating_trend")
+
+def chart_star_breakdown(df):
+    if len(df) < 2: return
+    st.plotly_chart(_fig_star_breakdown(df), use_container_width=True, key="chart_star_breakdown")
+
+def chart_volume(df):
+    if len(df) < 2: return
+    st.plotly_chart(_fig_volume(df), use_container_width=True, key="chart_volume")
 
 
 # ============================================================
 # THEME DEDUP + CHARTS
 # ============================================================
-def _merge_similar_themes(theme_data: dict, threshold: float = 0.6) -> dict:
-    from difflib import SequenceMatcher
+def _theme_merge_key(pivot) -> tuple:
+    """
+    Immutable snapshot of the (theme, sentiment) x period mentions pivot,
+    used as the cache key for _merge_similar_themes.
+    """
+    periods = list(pivot.columns)
+    return tuple(
+        (theme, sentiment, int(total), tuple((p, int(c)) for p, c in zip(periods, row) if c))
+        for (theme, sentiment), total, row in zip(pivot.index, pivot.sum(axis=1).to_numpy(), pivot.to_numpy())
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _merge_similar_themes(theme_key: tuple, threshold: float = 0.6) -> dict:
+    """
+    Merge near-duplicate theme names. Takes _theme_merge_key(theme_data) so the
+    result is cached — reruns with the same themes skip the pairwise matching.
+    """
+    import numpy as np
+    from rapidfuzz import fuzz, process
 
     normalized = {}
-    for name, data in theme_data.items():
+    for name, sentiment, total, periods in theme_key:
         key = name.lower().strip()
         if key not in normalized:
-            normalized[key] = {"sentiment": data["sentiment"], "periods": {}, "total": 0, "display_name": name}
-        for period, count in data["periods"].items():
+            normalized[key] = {"sentiment": sentiment, "periods": {}, "total": 0, "display_name": name}
+        for period, count in periods:
             normalized[key]["periods"][period] = normalized[key]["periods"].get(period, 0) + count
-        normalized[key]["total"] += data["total"]
-        if data["total"] > (normalized[key]["total"] - data["total"]):
+        normalized[key]["total"] += total
+        if total > (normalized[key]["total"] - total):
             normalized[key]["display_name"] = name
 
     keys = list(normalized.keys())
-    merged = {}
-    used = set()
 
+    # Themes only merge within the same sentiment, so each sentiment is scored on its own —
+    # this halves the comparisons and drops the per-pair sentiment check
+    by_sentiment = {}
+    for i, k in enumerate(keys):
+        by_sentiment.setdefault(normalized[k]["sentiment"], []).append(i)
+
+    matches = {}
+    for idxs in by_sentiment.values():
+        names = [keys[i] for i in idxs]
+        pairs = set()
+
+        # Candidate pairs from rapidfuzz's C batch scorers (scores below the cutoff come back as 0):
+        # similar spelling (ratio >= threshold), or one name contained in the other (partial_ratio == 100)
+        similar = process.cdist(names, names, scorer=fuzz.ratio, score_cutoff=threshold * 100, workers=-1)
+        contained = process.cdist(names, names, scorer=fuzz.partial_ratio, score_cutoff=100, workers=-1)
+        pairs.update(zip(*np.nonzero(np.triu(similar + contained, k=1))))
+
+        # Plus pairs sharing at least half their words — only names with a common word can qualify
+        words = [set(n.split()) for n in names]
+        by_word = {}
+        for i, ws in enumerate(words):
+            for w in ws:
+                by_word.setdefault(w, []).append(i)
+        for word_idxs in by_word.values():
+            for n, i in enumerate(word_idxs):
+                for j in word_idxs[n + 1:]:
+                    if (i, j) not in pairs and len(words[i] & words[j]) / len(words[i] | words[j]) >= 0.5:
+                        pairs.add((i, j))
+
+        for i, j in pairs:
+            matches.setdefault(idxs[i], []).append(idxs[j])
+
+    # Each unused theme absorbs the later unused themes that match it directly
+    groups = []
+    used = set()
     for i, k1 in enumerate(keys):
-        if k1 in used:
+        if i in used:
             continue
         group = [k1]
-        for j, k2 in enumerate(keys):
-            if j <= i or k2 in used:
-                continue
-            if normalized[k1]["sentiment"] != normalized[k2]["sentiment"]:
-                continue
-            ratio = SequenceMatcher(None, k1, k2).ratio()
-            contained = k1 in k2 or k2 in k1
-            words1, words2 = set(k1.split()), set(k2.split())
-            word_overlap = len(words1 & words2) / max(len(words1 | words2), 1)
-            if ratio >= threshold or contained or word_overlap >= 0.5:
-                group.append(k2)
-                used.add(k2)
+        for j in sorted(matches.get(i, [])):
+            if j not in used:
+                group.append(keys[j])
+                used.add(j)
+        groups.append(group)
+        used.add(i)
 
+    merged = {}
+    for group in groups:
         canonical = min(group, key=lambda g: len(g))
         display = normalized[canonical]["display_name"]
-        merged_entry = {"sentiment": normalized[k1]["sentiment"], "periods": {}, "total": 0}
+        merged_entry = {"sentiment": normalized[group[0]]["sentiment"], "periods": {}, "total": 0}
         for g in group:
             for period, count in normalized[g]["periods"].items():
                 merged_entry["periods"][period] = merged_entry["periods"].get(period, 0) + count
             merged_entry["total"] += normalized[g]["total"]
         merged[display.lower()] = merged_entry
-        used.add(k1)
 
     return merged
 
 
-def _render_theme_chart(themes_list, period_labels, sentiment, colors, key_prefix):
-    """Render a single theme trend chart with filter. Reused for positive and negative."""
-    if not themes_list:
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_theme_figure(y_df, colors):
+    """
+    One trace per theme, all hidden (legend only) by default.
+    Cached: st.cache_data hands back a fresh copy, so callers can set visibility freely.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for idx, name in enumerate(y_df.columns):
+        fig.add_trace(go.Scatter(
+            x=y_df.index,
+            y=y_df[name].values,
+            mode="lines+markers", name=name, visible="legendonly",
+            line=dict(width=2, color=colors[idx % len(colors)], shape="spline"),
+            marker=dict(size=5)
+        ))
+    fig.update_layout(
+        height=420, title="", yaxis_title="Mentions",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0)
+    )
+    apply_chart_style(fig)
+    return fig
+
+
+@st.fragment
+def _render_theme_chart(y_df, sentiment, colors, key_prefix):
+    """
+    Render a single theme trend chart with filter. Reused for positive and negative.
+    Runs as a fragment — changing the filter reruns only this chart, not the whole page.
+
+    y_df: mentions per period (index) for each theme (columns), top themes first.
+    """
+    if y_df.empty:
         st.caption("None detected.")
         return
 
-    all_names = [name for name, _ in themes_list]
+    all_names = list(y_df.columns)
 
     # The widget key — Streamlit stores the multiselect value under this key.
     # After first render, `default` is ignored. To change the selection,
@@ -421,16 +609,16 @@ def _render_theme_chart(themes_list, period_labels, sentiment, colors, key_prefi
     if widget_key not in st.session_state:
         st.session_state[widget_key] = all_names.copy()
 
-    # Select All / Clear All — write directly to the widget key
+    # Select All / Clear All — write directly to the widget key.
+    # The buttons render before the multiselect, so it picks up the new value
+    # later in this same run; no st.rerun() needed.
     fc1, fc2, fc3 = st.columns([1, 1, 4])
     with fc1:
         if st.button("Select all", key=f"{key_prefix}_sel_all", use_container_width=True):
             st.session_state[widget_key] = all_names.copy()
-            st.rerun()
     with fc2:
         if st.button("Clear all", key=f"{key_prefix}_clr_all", use_container_width=True):
             st.session_state[widget_key] = []
-            st.rerun()
 
     selected = st.multiselect(
         f"Filter {sentiment} themes", all_names,
@@ -438,50 +626,48 @@ def _render_theme_chart(themes_list, period_labels, sentiment, colors, key_prefi
     )
 
     if selected:
-        fig = go.Figure()
-        idx = 0
-        for name, data in themes_list:
-            if name not in selected:
-                continue
-            fig.add_trace(go.Scatter(
-                x=period_labels,
-                y=[data["periods"].get(p, 0) for p in period_labels],
-                mode="lines+markers", name=name,
-                line=dict(width=2, color=colors[idx % len(colors)], shape="spline"),
-                marker=dict(size=5)
-            ))
-            idx += 1
-        fig.update_layout(
-            height=420, title="", yaxis_title="Mentions",
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0)
-        )
-        apply_chart_style(fig)
-        st.plotly_chart(fig, use_container_width=True)
+        # Same figure every time; a filter change only flips trace visibility
+        fig = _build_theme_figure(y_df, tuple(colors))
+        for trace in fig.data:
+            trace.visible = True if trace.name in selected else "legendonly"
+        st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_chart")
     else:
         st.caption("No themes selected. Click **Select all** or pick from the list.")
 
 
-def chart_theme_trends(app_id, analyses, period_type):
-    if not analyses: return
-    theme_data = {}
-    period_labels = sorted([a["period_label"] for a in analyses])
-    for a in analyses:
-        for t in get_themes_for_period(app_id, period_type, a["period_label"]):
-            name = t["theme"]
-            if name not in theme_data:
-                theme_data[name] = {"sentiment": t["sentiment"], "periods": {}, "total": 0}
-            theme_data[name]["periods"][a["period_label"]] = t.get("mention_count", 0)
-            theme_data[name]["total"] += t.get("mention_count", 0)
-    if not theme_data:
+def chart_theme_trends(app_id, labels, period_type):
+    import heapq
+    import pandas as pd
+
+    if not labels: return
+    period_labels = sorted(labels)
+    # One query for all periods, not one query per period
+    rows = _cached_themes_for_periods(app_id, period_type, tuple(period_labels))
+    if not rows:
         st.caption("No themes found.")
         return
 
-    theme_data = _merge_similar_themes(theme_data)
+    # (theme, sentiment) x period mention counts in one groupby — sort=False keeps
+    # first-seen order, which the greedy merge depends on
+    rows_df = pd.DataFrame(rows, columns=["theme", "sentiment", "period_label", "mention_count"])
+    pivot = (rows_df.groupby(["theme", "sentiment", "period_label"], sort=False)["mention_count"]
+             .sum().unstack(fill_value=0))
 
-    positive = sorted([(k, v) for k, v in theme_data.items() if v["sentiment"] == "positive"],
-                       key=lambda x: x[1]["total"], reverse=True)[:10]
-    negative = sorted([(k, v) for k, v in theme_data.items() if v["sentiment"] == "negative"],
-                       key=lambda x: x[1]["total"], reverse=True)[:10]
+    theme_data = _merge_similar_themes(_theme_merge_key(pivot))
+
+    # One pass to split by sentiment, then a top-10 heap per side instead of two full sorts
+    # (nlargest keeps the same tie order as sorted(..., reverse=True)[:10])
+    by_sentiment = {"positive": [], "negative": []}
+    for item in theme_data.items():
+        bucket = by_sentiment.get(item[1]["sentiment"])
+        if bucket is not None:
+            bucket.append(item)
+    positive = heapq.nlargest(10, by_sentiment["positive"], key=lambda x: x[1]["total"])
+    negative = heapq.nlargest(10, by_sentiment["negative"], key=lambda x: x[1]["total"])
+
+    # Mentions matrix (periods x shown themes), built once — each chart slices its columns by name
+    y_df = pd.DataFrame({name: [data["periods"].get(p, 0) for p in period_labels]
+                         for name, data in positive + negative}, index=period_labels)
 
     pos_colors = ["#5a9e6f", "#8aad6e", "#6db58a", "#4e8e6a", "#7bb87a",
                   "#3d8b6e", "#9aba72", "#69a878", "#84c48a", "#5fb87a"]
@@ -489,16 +675,16 @@ def chart_theme_trends(app_id, analyses, period_type):
                   "#8c3e32", "#d4826a", "#e89a7a", "#c97860", "#a65c4c"]
 
     st.markdown("##### Positive themes")
-    _render_theme_chart(positive, period_labels, "positive", pos_colors, "pos")
+    _render_theme_chart(y_df[[name for name, _ in positive]], "positive", pos_colors, "pos")
 
     st.markdown("---")
 
     st.markdown("##### Negative themes")
-    _render_theme_chart(negative, period_labels, "negative", neg_colors, "neg")
+    _render_theme_chart(y_df[[name for name, _ in negative]], "negative", neg_colors, "neg")
 
 
 def render_period_themes(app_id, period_type, period_label):
-    themes = get_themes_for_period(app_id, period_type, period_label)
+    themes = _cached_themes(app_id, period_type, period_label)
     if not themes:
         st.caption("No themes for this period.")
         return
@@ -509,21 +695,13 @@ def render_period_themes(app_id, period_type, period_label):
         st.markdown("##### ✅ Positive")
         for i, t in enumerate(pos, 1):
             with st.expander(f"{i}. {t['theme']} — {t['mention_count']} mentions"):
-                try:
-                    samples = json.loads(t.get("sample_reviews", "[]"))
-                except (TypeError, json.JSONDecodeError):
-                    samples = []
-                for s in samples[:3]:
+                for s in t["sample_reviews"][:3]:
                     st.markdown(f"> *\"{s}\"*")
     with c2:
         st.markdown("##### ❌ Negative")
         for i, t in enumerate(neg, 1):
             with st.expander(f"{i}. {t['theme']} — {t['mention_count']} mentions"):
-                try:
-                    samples = json.loads(t.get("sample_reviews", "[]"))
-                except (TypeError, json.JSONDecodeError):
-                    samples = []
-                for s in samples[:3]:
+                for s in t["sample_reviews"][:3]:
                     st.markdown(f"> *\"{s}\"*")
 
 
@@ -534,7 +712,35 @@ CHATBOT_SYSTEM = """You are an expert app review analyst. Answer using ONLY the
 Rules: 1. Cite numbers, periods, themes. 2. Be concise and actionable. 3. Use customer quotes when possible.
 4. If data doesn't cover the question, say so. 5. Use bullets and bold for structure."""
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_chat_context(app_id):
+    """
+    The DATA block sent with every chatbot question: app summary, the last 12 months
+    and all quarters with their top themes. Cached — it only changes when analysis reruns.
+    """
+    meta = get_metadata(app_id)
+    monthly = _cached_analyses(app_id, "monthly")[-12:]
+    quarterly = _cached_analyses(app_id, "quarterly")
+    m_pos, m_neg = _themes_by_sentiment(
+        _cached_themes_for_periods(app_id, "monthly", tuple(m["period_label"] for m in monthly)),
+        lambda t: t["theme"])
+    q_pos, q_neg = _themes_by_sentiment(
+        _cached_themes_for_periods(app_id, "quarterly", tuple(qq["period_label"] for qq in quarterly)),
+        lambda t: f"{t['theme']}({t['mention_count']})")
+
+    ctx = [f"App: {meta.get('app_name', app_id)}, Total reviews: {meta.get('total_reviews_stored', '?')}"]
+    ctx += [f"{m['period_label']}: {m['total_reviews']} reviews, avg {m['avg_rating']}, "
+            f"+[{','.join(m_pos.get(m['period_label'], [])[:3])}] -[{','.join(m_neg.get(m['period_label'], [])[:3])}]"
+            for m in monthly]
+    ctx += [f"{qq['period_label']}: {qq['total_reviews']} reviews, avg {qq['avg_rating']}, "
+            f"+[{','.join(q_pos.get(qq['period_label'], [])[:5])}] -[{','.join(q_neg.get(qq['period_label'], [])[:5])}]"
+            for qq in quarterly]
+    return "\n".join(ctx)
+
+
+@st.fragment
 def render_chatbot(app_id):
+    # Fragment: sending a message reruns only the chat, not the charts and sidebar
     st.markdown("#### Ask anything about this app's reviews")
 
     if "chat_history" not in st.session_state:
@@ -547,15 +753,15 @@ def render_chatbot(app_id):
         with sq1:
             if st.button("What are the top complaints?", key="sq1", use_container_width=True):
                 st.session_state.chat_history.append({"role": "user", "content": "What are the top complaints?"})
-                st.rerun()
+                st.rerun(scope="fragment")
         with sq2:
             if st.button("How did sentiment change?", key="sq2", use_container_width=True):
                 st.session_state.chat_history.append({"role": "user", "content": "How did sentiment change over time?"})
-                st.rerun()
+                st.rerun(scope="fragment")
         with sq3:
             if st.button("What do users love most?", key="sq3", use_container_width=True):
                 st.session_state.chat_history.append({"role": "user", "content": "What do users love most about this app?"})
-                st.rerun()
+                st.rerun(scope="fragment")
 
     for msg in st.session_state.chat_history:
         with st.chat_message(msg["role"]):
@@ -568,38 +774,166 @@ def render_chatbot(app_id):
             st.markdown(q)
         with st.chat_message("assistant"):
             with st.spinner("Analyzing..."):
-                ctx = []
-                meta = get_metadata(app_id)
-                ctx.append(f"App: {meta.get('app_name', app_id)}, Total reviews: {meta.get('total_reviews_stored', '?')}")
-                for m in get_all_period_analyses(app_id, "monthly")[-12:]:
-                    themes = get_themes_for_period(app_id, "monthly", m["period_label"])
-                    p = [t["theme"] for t in themes if t["sentiment"] == "positive"][:3]
-                    n = [t["theme"] for t in themes if t["sentiment"] == "negative"][:3]
-                    ctx.append(f"{m['period_label']}: {m['total_reviews']} reviews, avg {m['avg_rating']}, +[{','.join(p)}] -[{','.join(n)}]")
-                for qq in get_all_period_analyses(app_id, "quarterly"):
-                    themes = get_themes_for_period(app_id, "quarterly", qq["period_label"])
-                    p = [f"{t['theme']}({t['mention_count']})" for t in themes if t["sentiment"] == "positive"][:5]
-                    n = [f"{t['theme']}({t['mention_count']})" for t in themes if t["sentiment"] == "negative"][:5]
-                    ctx.append(f"{qq['period_label']}: {qq['total_reviews']} reviews, avg {qq['avg_rating']}, +[{','.join(p)}] -[{','.join(n)}]")
-                resp = call_llm(CHATBOT_SYSTEM, f"DATA:\n{chr(10).join(ctx)}\n\nQUESTION: {q}", temperature=0.2, expect_json=False)
-                st.markdown(resp)
-                st.session_state.chat_history.append({"role": "assistant", "content": resp})
+                data_block = _build_chat_context(app_id)
+            # Stream tokens into the bubble as they arrive; write_stream returns the full text
+            resp = st.write_stream(call_llm_stream(CHATBOT_SYSTEM, f"DATA:\n{data_block}\n\nQUESTION: {q}", temperature=0.2))
+            st.session_state.chat_history.append({"role": "assistant", "content": resp})
+
+
+# ============================================================
+# DASHBOARD + MANAGE TABS
+# ============================================================
+@st.fragment
+def _render_dashboard_tab(app_id, meta):
+    # Fragment: the period view and period pickers rerun only this tab,
+    # not the scrape tab's DB counts or the sidebar
+    period_view = st.selectbox("View by", ["monthly", "quarterly", "yearly"], index=0, key="dash_period")
+    # Built once per period view and shared by the summary metrics, all charts and
+    # the period picker — one column per field instead of walking a list of dicts
+    df = _cached_analyses_df(app_id, period_view)
+
+    if df.empty:
+        st.info("No analysis data yet. Go to **Scrape & analyze** tab first.")
+        return
+
+    labels = df["period_label"].tolist()  # Ordered by period_start
+
+    # Data freshness bar
+    last_analyzed_date = meta.get("last_analyzed_date", "—") if meta else "—"
+    st.caption(f"Showing **{len(labels)}** {period_view} periods · "
+               f"{labels[0]} → {labels[-1]} · Last analyzed: {last_analyzed_date}")
+
+    # Summary metrics — column sums and a dot product on the numpy arrays
+    counts = df["total_reviews"].fillna(0).to_numpy()
+    total_reviews = int(counts.sum())
+    wavg = float(df["avg_rating"].fillna(0).to_numpy() @ counts)
+    avg = round(wavg / total_reviews, 2) if total_reviews else 0
+    text_r = int(df["reviews_with_text"].fillna(0).sum())
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Total reviews", f"{total_reviews:,}")
+    m2.metric("Avg rating", f"{avg} ★")
+    m3.metric("Periods", len(labels))
+    m4.metric("With text", f"{text_r:,}")
+
+    st.markdown("---")
+
+    # ---- Section 1: Ratings ----
+    st.markdown("### Ratings")
+    c1, c2 = st.columns(2)
+    with c1:
+        chart_rating_distribution(df)
+    with c2:
+        chart_rating_trend(df)
+
+    # ---- Section 2: Volume & Breakdown ----
+    st.markdown("### Volume & breakdown")
+    c1, c2 = st.columns(2)
+    with c1:
+        chart_volume(df)
+    with c2:
+        chart_star_breakdown(df)
+
+    st.markdown("---")
+
+    # ---- Section 3: Period detail (BEFORE theme trends — most actionable) ----
+    st.markdown("### Period detail")
+    _render_period_detail(app_id, period_view, labels)
+
+    st.markdown("---")
+
+    # ---- Section 4: Theme trends ----
+    st.markdown("### Theme trends")
+    chart_theme_trends(app_id, labels, period_view)
+
+
+@st.fragment
+def _render_period_detail(app_id, period_view, labels):
+    # Fragment: picking another period reloads only its themes, not the charts above
+    sel = st.selectbox("Select period", labels, index=len(labels) - 1, key="pd_sel")
+    render_period_themes(app_id, period_view, sel)
+
+
+@st.fragment
+def _render_manage_tab(app_id, meta):
+    # meta is the app summary render_dashboard already loaded (metadata + review date
+    # range) — every action here that changes data does a full st.rerun(), so it's never stale
+    st.markdown("### Manage app data")
+    if meta:
+        total_in_db = meta.get("total_reviews_stored", "0")
+        min_d, max_d = meta.get("min_review_date"), meta.get("max_review_date")
+        last_analyzed = meta.get("last_analyzed_date", "Never")
+        baseline = "Yes" if meta.get("seagull_analysis_complete") == "true" else "No"
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Reviews in database", f"{int(total_in_db):,}" if total_in_db else "0")
+        c2.metric("Last analyzed", last_analyzed)
+        c3.metric("Analysis complete", baseline)
+
+        if min_d and max_d:
+            st.caption(f"Review date range: **{min_d[:10]}** → **{max_d[:10]}** · "
+                       f"This count includes all reviews stored across all periods.")
+
+        st.markdown("---")
+        st.markdown("**Danger zone**")
+
+        dc1, dc2 = st.columns(2)
+        with dc1:
+            if st.button("🗑 Delete all data for this app", use_container_width=True):
+                st.session_state["confirm_delete"] = app_id
+
+        with dc2:
+            if st.button("🔄 Clear analysis only (keep reviews)", use_container_width=True):
+                st.session_state["confirm_clear_analysis"] = app_id
+
+        # Delete confirmation
+        if st.session_state.get("confirm_delete") == app_id:
+            st.warning(f"This will permanently delete **{total_in_db} reviews** and all analysis "
+                       f"for **{meta.get('app_name', app_id)}**.")
+            cc1, cc2, cc3 = st.columns([1, 1, 2])
+            with cc1:
+                if st.button("Yes, delete everything", type="primary", key="confirm_del_yes"):
+                    delete_app_data(app_id)
+                    st.session_state.pop("confirm_delete", None)
+                    _clear_app_state()
+                    st.rerun()
+            with cc2:
+                if st.button("Cancel", key="confirm_del_no"):
+                    st.session_state.pop("confirm_delete", None)
+                    st.rerun()
+
+        # Clear analysis confirmation
+        if st.session_state.get("confirm_clear_analysis") == app_id:
+            st.warning(f"This will clear all analysis results but keep the **{total_in_db} reviews** intact. "
+                       f"You can re-run analysis after.")
+            cc1, cc2, cc3 = st.columns([1, 1, 2])
+            with cc1:
+                if st.button("Yes, clear analysis", type="primary", key="confirm_clear_yes"):
+                    delete_analysis_only(app_id)
+                    _clear_data_caches()
+                    st.session_state.pop("confirm_clear_analysis", None)
+                    st.success("Analysis cleared. Reviews preserved.")
+                    st.rerun()
+            with cc2:
+                if st.button("Cancel", key="confirm_clear_no"):
+                    st.session_state.pop("confirm_clear_analysis", None)
+                    st.rerun()
+    else:
+        st.info("No data for this app yet. Go to **Scrape & analyze** to get started.")
 
 
 # ============================================================
 # MAIN DASHBOARD
 # ============================================================
 def render_dashboard(app_id, store, app_name_input):
-    meta = get_metadata(app_id)
+    meta = _cached_app_summary(app_id)
     app_name = meta.get("app_name", app_id) if meta else app_id
 
     # Header
-    st.markdown(f"""
-    <div style="display:flex; align-items:center; gap:10px; margin-bottom:0.2rem;">
-        <span style="font-size:1.3rem; color:#d97757;">◆</span>
-        <span style="font-size:1.3rem; font-weight:700; color:#e8e0d5;">{app_name}</span>
-        <span style="color:#6b6560; font-size:0.8rem; margin-left:auto;">App Store Agent</span>
-    </div>""", unsafe_allow_html=True)
+    # Styles live in CUSTOM_CSS (.app-header); the name is escaped since it comes from the store
+    st.markdown(f'<div class="app-header"><span class="mark">◆</span>'
+                f'<span class="name">{html.escape(app_name)}</span>'
+                f'<span class="tag">App Store Agent</span></div>', unsafe_allow_html=True)
 
     # Tabs
     tab_scrape, tab_analysis, tab_chat, tab_manage = st.tabs([
@@ -610,6 +944,8 @@ def render_dashboard(app_id, store, app_name_input):
     # TAB 1: SCRAPE & ANALYZE
     # ============================================================
     with tab_scrape:
+        from dateutil.relativedelta import relativedelta
+
         today = datetime.now()
         default_start = (today - relativedelta(years=1)).replace(day=1)
 
@@ -620,13 +956,14 @@ def render_dashboard(app_id, store, app_name_input):
         with c2:
             end_date = st.date_input("Period end", value=today, key="sa_end")
 
-        sd_str = start_date.strftime("%Y-%m-%d")
-        ed_str = end_date.strftime("%Y-%m-%d")
+        # date.isoformat() is "YYYY-MM-DD" — same string as strftime, without the format parsing
+        sd_str = start_date.isoformat()
+        ed_str = end_date.isoformat()
 
-        # Always use fresh DB count for the selected period — no stale cache
-        period_count = count_reviews_for_period(app_id, sd_str, ed_str)
-        last_scraped = get_last_scraped_date(app_id)
-        already_analyzed_months = set(get_analyzed_months(app_id))
+        # Cached per (app, period) — every scrape/analysis/delete clears these, so counts stay fresh
+        period_count = _cached_period_count(app_id, sd_str, ed_str)
+        last_scraped = _cached_last_scraped(app_id)
+        already_analyzed_months = set(_cached_analyzed_months(app_id))
         has_data = period_count > 0
 
         st.markdown("---")
@@ -644,9 +981,13 @@ def render_dashboard(app_id, store, app_name_input):
         else:
             # ---- HAS DATA: Analysis first ----
             months = get_month_ranges(sd_str, ed_str)
-            new_months = [(l, s, e) for l, s, e in months if l not in already_analyzed_months]
-            done_months = [(l, s, e) for l, s, e in months if l in already_analyzed_months]
-            unanalyzed_count = sum(count_reviews_for_period(app_id, s, e) for l, s, e in new_months)
+            # Split into not-yet-analyzed / already-analyzed months in one pass
+            new_months, done_months = [], []
+            for m in months:
+                (done_months if m[0] in already_analyzed_months else new_months).append(m)
+            # One grouped query for all months instead of one COUNT per month
+            month_counts = _cached_month_counts(app_id, months[0][1], months[-1][2]) if months else {}
+            unanalyzed_count = sum(month_counts.get(l, 0) for l, s, e in new_months)
             analyzed_count = period_count - unanalyzed_count
 
             st.markdown("### AI analysis")
@@ -687,12 +1028,22 @@ def render_dashboard(app_id, store, app_name_input):
                 force = bool(rerun_btn)
                 if force:
                     delete_analysis_only(app_id)
+                    _clear_data_caches()
                 progress = st.progress(0, text="Starting analysis...")
+                # Each update is a message to the browser — cap them at ~10/sec.
+                # Monthly LLM steps take seconds, so this only thins out the fast
+                # quarterly/yearly steps; the last step always gets through.
+                last_update = [0.0]
                 def cb(cur, tot, msg):
+                    now = time.monotonic()
+                    if now - last_update[0] < 0.1 and cur < tot:
+                        return
+                    last_update[0] = now
                     progress.progress(int((cur / tot) * 100) if tot else 0, text=msg)
                 try:
                     result = run_analysis(app_id, sd_str, ed_str,
                                           force_rerun=force, progress_callback=cb)
+                    _clear_data_caches()
                     progress.progress(100, text="Complete!")
                     st.success(f"**{result['months_analyzed']}** months analyzed · "
                                f"**{result['months_skipped']}** skipped · "
@@ -715,64 +1066,7 @@ def render_dashboard(app_id, store, app_name_input):
     # TAB 2: DASHBOARD
     # ============================================================
     with tab_analysis:
-        period_view = st.selectbox("View by", ["monthly", "quarterly", "yearly"], index=0, key="dash_period")
-        analyses = get_all_period_analyses(app_id, period_type=period_view)
-
-        if not analyses:
-            st.info("No analysis data yet. Go to **Scrape & analyze** tab first.")
-            return
-
-        # Data freshness bar
-        first_period = analyses[0]["period_label"] if analyses else "—"
-        last_period = analyses[-1]["period_label"] if analyses else "—"
-        last_analyzed_date = meta.get("last_analyzed_date", "—") if meta else "—"
-        st.caption(f"Showing **{len(analyses)}** {period_view} periods · "
-                   f"{first_period} → {last_period} · Last analyzed: {last_analyzed_date}")
-
-        # Summary metrics
-        total_reviews = sum(a.get("total_reviews", 0) for a in analyses)
-        wavg = sum(a.get("avg_rating", 0) * a.get("total_reviews", 0) for a in analyses)
-        avg = round(wavg / total_reviews, 2) if total_reviews else 0
-        text_r = sum(a.get("reviews_with_text", 0) for a in analyses)
-
-        m1, m2, m3, m4 = st.columns(4)
-        m1.metric("Total reviews", f"{total_reviews:,}")
-        m2.metric("Avg rating", f"{avg} ★")
-        m3.metric("Periods", len(analyses))
-        m4.metric("With text", f"{text_r:,}")
-
-        st.markdown("---")
-
-        # ---- Section 1: Ratings ----
-        st.markdown("### Ratings")
-        c1, c2 = st.columns(2)
-        with c1:
-            chart_rating_distribution(analyses)
-        with c2:
-            chart_rating_trend(analyses)
-
-        # ---- Section 2: Volume & Breakdown ----
-        st.markdown("### Volume & breakdown")
-        c1, c2 = st.columns(2)
-        with c1:
-            chart_volume(analyses)
-        with c2:
-            chart_star_breakdown(analyses)
-
-        st.markdown("---")
-
-        # ---- Section 3: Period detail (BEFORE theme trends — most actionable) ----
-        st.markdown("### Period detail")
-        if analyses:
-            labels = [a["period_label"] for a in analyses]
-            sel = st.selectbox("Select period", labels, index=len(labels) - 1, key="pd_sel")
-            render_period_themes(app_id, period_view, sel)
-
-        st.markdown("---")
-
-        # ---- Section 4: Theme trends ----
-        st.markdown("### Theme trends")
-        chart_theme_trends(app_id, analyses, period_view)
+        _render_dashboard_tab(app_id, meta)
 
     # ============================================================
     # TAB 3: CHATBOT
@@ -784,101 +1078,54 @@ def render_dashboard(app_id, store, app_name_input):
     # TAB 4: MANAGE
     # ============================================================
     with tab_manage:
-        st.markdown("### Manage app data")
-        meta = get_metadata(app_id)
-        if meta:
-            total_in_db = meta.get("total_reviews_stored", "0")
-            min_d, max_d = get_review_date_range(app_id)
-            last_analyzed = meta.get("last_analyzed_date", "Never")
-            baseline = "Yes" if meta.get("seagull_analysis_complete") == "true" else "No"
-
-            c1, c2, c3 = st.columns(3)
-            c1.metric("Reviews in database", f"{int(total_in_db):,}" if total_in_db else "0")
-            c2.metric("Last analyzed", last_analyzed)
-            c3.metric("Analysis complete", baseline)
-
-            if min_d and max_d:
-                st.caption(f"Review date range: **{min_d[:10]}** → **{max_d[:10]}** · "
-                           f"This count includes all reviews stored across all periods.")
-
-            st.markdown("---")
-            st.markdown("**Danger zone**")
-
-            dc1, dc2 = st.columns(2)
-            with dc1:
-                if st.button("🗑 Delete all data for this app", use_container_width=True):
-                    st.session_state["confirm_delete"] = app_id
-
-            with dc2:
-                if st.button("🔄 Clear analysis only (keep reviews)", use_container_width=True):
-                    st.session_state["confirm_clear_analysis"] = app_id
-
-            # Delete confirmation
-            if st.session_state.get("confirm_delete") == app_id:
-                st.warning(f"This will permanently delete **{total_in_db} reviews** and all analysis "
-                           f"for **{meta.get('app_name', app_id)}**.")
-                cc1, cc2, cc3 = st.columns([1, 1, 2])
-                with cc1:
-                    if st.button("Yes, delete everything", type="primary", key="confirm_del_yes"):
-                        delete_app_data(app_id)
-                        st.session_state.pop("confirm_delete", None)
-                        _clear_app_state()
-                        st.rerun()
-                with cc2:
-                    if st.button("Cancel", key="confirm_del_no"):
-                        st.session_state.pop("confirm_delete", None)
-                        st.rerun()
-
-            # Clear analysis confirmation
-            if st.session_state.get("confirm_clear_analysis") == app_id:
-                st.warning(f"This will clear all analysis results but keep the **{total_in_db} reviews** intact. "
-                           f"You can re-run analysis after.")
-                cc1, cc2, cc3 = st.columns([1, 1, 2])
-                with cc1:
-                    if st.button("Yes, clear analysis", type="primary", key="confirm_clear_yes"):
-                        delete_analysis_only(app_id)
-                        st.session_state.pop("confirm_clear_analysis", None)
-                        st.success("Analysis cleared. Reviews preserved.")
-                        st.rerun()
-                with cc2:
-                    if st.button("Cancel", key="confirm_clear_no"):
-                        st.session_state.pop("confirm_clear_analysis", None)
-                        st.rerun()
-        else:
-            st.info("No data for this app yet. Go to **Scrape & analyze** to get started.")
+        _render_manage_tab(app_id, meta)
 
 
 def _do_scrape(app_id, store, app_name_input, sd_str, ed_str):
     """Shared scraping logic. Scrapes only reviews within the selected period."""
-    since = datetime.strptime(sd_str, "%Y-%m-%d")
-    until = datetime.strptime(ed_str, "%Y-%m-%d")
+    # Imported here: the scraper pulls in google_play_scraper and requests,
+    # which only a scrape needs — not every dashboard rerun
+    from app.scraper import scrape_google_play, scrape_apple_app_store
+
+    # Half-open range, like the database queries: everything from the start of the
+    # first day up to (not including) midnight after the last day. An inclusive
+    # `<= midnight of ed_str` would drop every review posted during the last day.
+    since = datetime.fromisoformat(sd_str)
+    until = datetime.fromisoformat(ed_str) + timedelta(days=1)
 
     # Estimate a reasonable count based on period length
-    # ~500 reviews/month is a generous estimate for most apps
-    months_in_period = max(1, ((until.year - since.year) * 12 + until.month - since.month))
+    # ~500 reviews/month is a generous estimate for most apps.
+    # Year and month come straight from the "YYYY-MM-DD" strings — no date objects needed.
+    months_in_period = max(1, (int(ed_str[:4]) - int(sd_str[:4])) * 12 + int(ed_str[5:7]) - int(sd_str[5:7]))
     estimated_count = min(months_in_period * 2000, 40000)
 
     progress = st.progress(0, text=f"Scraping reviews from {sd_str} to {ed_str}...")
     try:
+        # Reviews we already have are skipped while scraping, not built and then
+        # ignored on insert
+        existing_ids = get_existing_review_ids(app_id)
         if store == "Google Play Store":
             app_info, fetched_reviews = scrape_google_play(
-                app_id, count=estimated_count, since_date=since, until_date=until
+                app_id, count=estimated_count, since_date=since, until_date=until,
+                existing_ids=existing_ids,
             )
         else:
             app_info, raw_reviews = scrape_apple_app_store(
-                app_id, app_name=app_name_input or "Unknown", count=10000
+                app_id, app_name=app_name_input or "Unknown", count=10000,
+                existing_ids=existing_ids,
             )
-            # Apple RSS doesn't support date filters — filter after fetch
-            fetched_reviews = [r for r in raw_reviews
-                               if since <= (r.date.replace(tzinfo=None) if hasattr(r.date, 'tzinfo') and r.date.tzinfo else r.date) <= until]
+            # Apple RSS doesn't support date filters — filter after fetch.
+            # replace(tzinfo=None) leaves naive dates as they are, so no tzinfo check is needed.
+            fetched_reviews = [r for r in raw_reviews if since <= r.date.replace(tzinfo=None) < until]
 
-        progress.progress(50, text=f"Found {len(fetched_reviews)} reviews in period. Storing...")
+        progress.progress(50, text=f"Found {len(fetched_reviews)} new reviews in period. Storing...")
         initialize_database(app_info.app_id, app_info.app_name, app_info.store)
         stored = store_reviews(app_info.app_id, fetched_reviews)
+        _clear_data_caches()
         progress.progress(100, text="Done!")
         new_period_count = count_reviews_for_period(app_id, sd_str, ed_str)
-        st.success(f"**{len(fetched_reviews):,}** reviews found in period · **{stored:,}** new · "
-                   f"**{len(fetched_reviews) - stored:,}** duplicates skipped")
+        st.success(f"**{stored:,}** new reviews stored "
+                   f"(reviews already in the database were skipped while scraping)")
         st.info(f"**{new_period_count:,}** total reviews now in your selected period.")
     except Exception as e:
         import traceback
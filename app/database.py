@@ -16,44 +16,112 @@ Key concept — SQL (Structured Query Language):
 import sqlite3
 import os
 import json
-from datetime import datetime, date
-from typing import Optional
+import tempfile
+import threading
+from datetime import datetime, date, timedelta
+from itertools import islice
+from typing import Iterator, Optional
 from app.models import Review, AppInfo
 from app.config import DATABASE_DIR
 
+# Rows per executemany() call when storing reviews
+STORE_BATCH_SIZE = 1000
+
 
 def list_analyzed_apps() -> list[dict]:
     """
     Scan the database directory and return info about all previously analyzed apps.
-    Each app has its own .db file — we read metadata from each one.
+    Each app has its own .db file, with a small .meta.json copy of its metadata
+    next to it — reading that JSON is much cheaper than opening every database.
     """
     apps = []
-    if not os.path.exists(DATABASE_DIR):
+
+    # One directory scan: note which sidecars exist, keep the .db files in listing order.
+    # DirEntry.is_file() uses the type the scan already returned — no extra stat call —
+    # and a missing directory is just an empty listing.
+    db_paths = []
+    sidecars = set()
+    try:
+        with os.scandir(DATABASE_DIR) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith(".db"):
+                    db_paths.append(entry.path)
+                elif entry.name.endswith(".meta.json"):
+                    sidecars.add(entry.path)
+    except FileNotFoundError:
         return apps
 
-    for filename in os.listdir(DATABASE_DIR):
-        if filename.endswith(".db"):
-            db_path = os.path.join(DATABASE_DIR, filename)
-            try:
-                conn = sqlite3.connect(db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                # Check if app_metadata table exists
-                cursor.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='app_metadata'"
-                )
-                if cursor.fetchone():
-                    cursor.execute("SELECT key, value FROM app_metadata")
-                    meta = {row["key"]: row["value"] for row in cursor.fetchall()}
-                    if meta.get("app_id"):
-                        apps.append(meta)
-                conn.close()
-            except Exception:
-                continue
+    for db_path in db_paths:
+        meta_path = _meta_path_for(db_path)
+        try:
+            if meta_path in sidecars:
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+            else:
+                # No sidecar yet (database from before sidecars existed) — read it once
+                # from SQLite and write the sidecar so the next listing can skip this
+                meta = _read_metadata_file(db_path)
+                if meta.get("app_id"):
+                    _write_meta_sidecar(meta_path, meta)
+            if meta.get("app_id"):
+                apps.append(meta)
+        except Exception:
+            continue
 
     return apps
 
 
+def _read_metadata_file(db_path: str) -> dict:
+    """Read app_metadata straight from a database file, without the connection cache."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        # Check if app_metadata table exists
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='app_metadata'"
+        )
+        if not cursor.fetchone():
+            return {}
+        cursor.execute("SELECT key, value FROM app_metadata")
+        return dict(cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def _meta_path_for(db_path: str) -> str:
+    """Sidecar metadata file for a database: "com_spotify_music.db" → "com_spotify_music.meta.json"."""
+    return db_path[:-len(".db")] + ".meta.json"
+
+
+def _write_meta_sidecar(meta_path: str, meta: dict) -> None:
+    """Write the metadata sidecar atomically (temp file + rename), so readers never see half a file."""
+    # A temp file of its own per write: two threads syncing the same app's sidecar
+    # (two sessions, or a listing backfill during a scrape) never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(meta_path),
+                                    prefix=os.path.basename(meta_path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _sync_meta_sidecar(app_id: str) -> None:
+    """Refresh the app's .meta.json after its metadata changed. Call after committing."""
+    try:
+        _write_meta_sidecar(_meta_path_for(_get_db_path(app_id)), get_metadata(app_id))
+    except OSError as e:
+        # Not fatal — list_analyzed_apps falls back to reading the database
+        print(f"  Warning: could not write metadata sidecar for {app_id}: {e}")
+
+
 def delete_app_data(app_id: str) -> int:
     """
     Delete ALL data for an app — reviews, analysis, themes, metadata.
@@ -63,7 +131,7 @@ def delete_app_data(app_id: str) -> int:
     if not os.path.exists(db_path):
         return 0
 
-    conn = sqlite3.connect(db_path)
+    conn = _get_connection(app_id)
     cursor = conn.cursor()
     review_count = 0
     try:
@@ -71,10 +139,25 @@ def delete_app_data(app_id: str) -> int:
         review_count = cursor.fetchone()[0]
     except sqlite3.OperationalError:
         pass
-    conn.close()
-
-    # Delete the entire database file
+    close_app(app_id)
+    # Other threads' cached connections can't be closed from here (a sqlite3
+    # connection belongs to its thread) — mark them stale so each thread reopens
+    # on its next call instead of reading and writing the deleted file
+    with _generations_lock:
+        _generations[app_id] = _generations.get(app_id, 0) + 1
+    _prepared_files.discard(db_path)  # A new file at this path needs setting up again
+    _schema_cache.pop(app_id, None)
+
+    # Delete the entire database file, SQLite's WAL/shared-memory files next to it,
+    # and its metadata sidecar. This thread's connection is closed first: an open
+    # handle would block the delete on Windows, and on POSIX keep the removed file
+    # alive in memory.
     os.remove(db_path)
+    for leftover in (db_path + "-wal", db_path + "-shm", _meta_path_for(db_path)):
+        try:
+            os.remove(leftover)
+        except FileNotFoundError:
+            pass
     return review_count
 
 
@@ -85,14 +168,12 @@ def get_analyzed_months(app_id: str) -> list[str]:
     """
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    if not _table_exists(cursor, "period_analysis"):
-        conn.close()
+    if not _has_table(app_id, cursor, "period_analysis"):
         return []
     cursor.execute(
         "SELECT period_label FROM period_analysis WHERE period_type = 'monthly' ORDER BY period_start ASC"
     )
     result = [row[0] for row in cursor.fetchall()]
-    conn.close()
     return result
 
 
@@ -106,11 +187,12 @@ def count_unanalyzed_reviews(app_id: str, start_date: str, end_date: str) -> tup
     total = count_reviews_for_period(app_id, start_date, end_date)
     already_done = set(get_analyzed_months(app_id))
     months = get_month_ranges(start_date, end_date)
+    if not months:
+        return 0, total
 
-    unanalyzed = 0
-    for label, m_start, m_end in months:
-        if label not in already_done:
-            unanalyzed += count_reviews_for_period(app_id, m_start, m_end)
+    # One grouped COUNT over the whole span instead of one COUNT per month
+    by_month = count_reviews_by_month(app_id, months[0][1], months[-1][2])
+    unanalyzed = sum(by_month.get(label, 0) for label, _, _ in months if label not in already_done)
 
     return unanalyzed, total
 
@@ -122,12 +204,10 @@ def get_last_scraped_date(app_id: str) -> str:
     """
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    if not _table_exists(cursor, "reviews"):
-        conn.close()
+    if not _has_table(app_id, cursor, "reviews"):
         return ""
     cursor.execute("SELECT MAX(date) FROM reviews")
     row = cursor.fetchone()
-    conn.close()
     return row[0] if row and row[0] else ""
 
 
@@ -139,14 +219,16 @@ def delete_analysis_only(app_id: str) -> None:
     conn = _get_connection(app_id)
     cursor = conn.cursor()
     try:
-        cursor.execute("DELETE FROM period_analysis")
-        cursor.execute("DELETE FROM themes")
-        cursor.execute("UPDATE app_metadata SET value = '' WHERE key = 'last_analyzed_date'")
-        cursor.execute("UPDATE app_metadata SET value = 'false' WHERE key = 'seagull_analysis_complete'")
-        conn.commit()
+        with conn:  # Commits on success, rolls back if anything raises
+            cursor.execute("DELETE FROM period_analysis")
+            cursor.execute("DELETE FROM themes")
+            cursor.executemany(
+                "UPDATE app_metadata SET value = ? WHERE key = ?",
+                [("", "last_analyzed_date"), ("false", "seagull_analysis_complete")]
+            )
     except sqlite3.OperationalError:
-        pass
-    conn.close()
+        return  # Tables not created yet — nothing to clear
+    _sync_meta_sidecar(app_id)
 
 
 def aggregate_themes_from_monthly(app_id: str, period_type: str, period_label: str,
@@ -158,53 +240,52 @@ def aggregate_themes_from_monthly(app_id: str, period_type: str, period_label: s
     """
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    if not _table_exists(cursor, "themes"):
-        conn.close()
+    if not _has_table(app_id, cursor, "themes"):
         return []
 
-    # Collect all monthly themes
-    theme_map = {}  # {(theme_name, sentiment): {total_count, samples, confidences}}
+    if not monthly_labels:
+        return []
 
-    for m_label in monthly_labels:
-        cursor.execute(
-            "SELECT * FROM themes WHERE period_type = 'monthly' AND period_label = ?",
-            (m_label,)
+    # One GROUP BY over all the months instead of a query per month plus a Python dict.
+    # seq numbers the monthly rows in month order, so we can recover "first seen" order
+    # (for ties) and keep each theme's samples in month order — SQLite doesn't guarantee
+    # the order group_concat joins them in. JSON never contains a raw \x1f, so it's a
+    # safe separator between the per-month sample lists.
+    placeholders = ",".join("?" * len(monthly_labels))
+    cursor.execute(f"""
+        SELECT theme, sentiment,
+               SUM(mention_count) AS mention_count,
+               AVG(confidence) AS confidence,
+               MIN(seq) AS first_seen,
+               group_concat(seq || ':' || COALESCE(sample_reviews, '[]'), char(31)) AS samples
+        FROM (
+            SELECT *, row_number() OVER (ORDER BY period_label, id) AS seq
+            FROM themes
+            WHERE period_type = 'monthly' AND period_label IN ({placeholders})
         )
-        for row in cursor.fetchall():
-            row = dict(row)
-            key = (row["theme"], row["sentiment"])
-            if key not in theme_map:
-                theme_map[key] = {
-                    "theme": row["theme"],
-                    "sentiment": row["sentiment"],
-                    "mention_count": 0,
-                    "sample_reviews": [],
-                    "confidences": [],
-                }
-            theme_map[key]["mention_count"] += row.get("mention_count", 0)
+        GROUP BY theme, sentiment
+        ORDER BY mention_count DESC, first_seen ASC
+    """, monthly_labels)
+
+    result = []
+    for row in cursor:
+        parts = sorted((part.partition(":") for part in row["samples"].split("\x1f")),
+                       key=lambda p: int(p[0]))
+        samples = []
+        for _, _, sample_json in parts:
             try:
-                samples = json.loads(row.get("sample_reviews", "[]"))
-                theme_map[key]["sample_reviews"].extend(samples)
+                samples.extend(json.loads(sample_json))
             except (TypeError, json.JSONDecodeError):
                 pass
-            theme_map[key]["confidences"].append(row.get("confidence", 0))
-
-    conn.close()
-
-    # Build aggregated theme list
-    result = []
-    for key, data in theme_map.items():
-        avg_conf = sum(data["confidences"]) / len(data["confidences"]) if data["confidences"] else 0
+            if len(samples) >= 5:
+                break
         result.append({
-            "theme": data["theme"],
-            "sentiment": data["sentiment"],
-            "mention_count": data["mention_count"],
-            "sample_reviews": json.dumps(data["sample_reviews"][:5]),  # Keep top 5 samples
-            "confidence": round(avg_conf, 2),
+            "theme": row["theme"],
+            "sentiment": row["sentiment"],
+            "mention_count": row["mention_count"],
+            "sample_reviews": json.dumps(samples[:5]),  # Keep top 5 samples
+            "confidence": round(row["confidence"] or 0, 2),
         })
-
-    # Sort by mention count
-    result.sort(key=lambda x: x["mention_count"], reverse=True)
     return result
 
 
@@ -222,25 +303,147 @@ def _get_db_path(app_id: str) -> str:
     return os.path.join(DATABASE_DIR, f"{safe_name}.db")
 
 
+# Open connections, one per app database per thread.
+# Opening SQLite on every helper call means an open() syscall, PRAGMA setup and a
+# schema read each time — and the dashboard makes dozens of small queries per rerun.
+# Thread-local because a sqlite3 connection shouldn't be shared between threads
+# (Streamlit runs each browser session in its own).
+_local = threading.local()
+
+# How many times each app's database has been deleted in this process. A cached
+# connection remembers the generation it was opened in; once delete_app_data bumps
+# it, every thread's old connection (other browser sessions, analysis workers) is
+# stale — it points at the removed file — and is reopened on that thread's next call.
+_generations: dict[str, int] = {}
+_generations_lock = threading.Lock()
+
+# Database files this process has already set up — WAL mode and indexes (see _get_connection)
+_prepared_files = set()
+
+# Tables known to exist, per app (see _has_table). Tables are only ever added, or the
+# whole file deleted (delete_app_data drops the entry), so a cached name stays valid.
+_schema_cache: dict[str, set[str]] = {}
+
+# Secondary indexes for the columns every dashboard/analysis query filters on.
+# Without them each date-range or per-period query is a full table scan.
+_INDEXES = {
+    "reviews": "CREATE INDEX IF NOT EXISTS idx_reviews_date ON reviews(date)",
+    "themes": "CREATE INDEX IF NOT EXISTS idx_themes_period ON themes(period_type, period_label)",
+    "period_analysis": ("CREATE INDEX IF NOT EXISTS idx_period_analysis_type_start "
+                        "ON period_analysis(period_type, period_start)"),
+}
+
+
+# Statements on the hot paths (ingest, per-period reads, storing results), kept as
+# module constants. sqlite3 keeps a per-connection cache of prepared statements keyed
+# by the SQL text, so the same string is parsed and planned once per connection —
+# a query assembled per call (e.g. by string concatenation) would miss that cache.
+_INSERT_REVIEW_SQL = """
+    INSERT OR IGNORE INTO reviews
+    (review_id, source, rating, text, date, username, thumbs_up)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SELECT_REVIEWS_SQL = """
+    SELECT review_id, source, rating, text, date, username, thumbs_up
+    FROM reviews
+    WHERE date >= ? AND date < ?
+    ORDER BY date ASC, review_id ASC
+"""
+_SELECT_REVIEWS_PAGE_SQL = _SELECT_REVIEWS_SQL + " LIMIT ? OFFSET ?"
+
+_INSERT_PERIOD_ANALYSIS_SQL = """
+    INSERT OR REPLACE INTO period_analysis
+    (period_type, period_label, period_start, period_end,
+     total_reviews, rating_1, rating_2, rating_3, rating_4, rating_5,
+     avg_rating, reviews_with_text, reviews_without_text)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_THEME_SQL = """
+    INSERT INTO themes
+    (period_type, period_label, theme, sentiment, mention_count,
+     sample_reviews, confidence)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Every character Python's str.strip() / str.isspace() counts as whitespace — ASCII
+# controls, NBSP and the Unicode spaces — as a char() list for SQLite's trim(),
+# which on its own only strips plain spaces. Queries that decide whether a review
+# "has text" trim with it, so they agree with the Python checks in processor.py.
+_WHITESPACE_SQL = ("char(9, 10, 11, 12, 13, 28, 29, 30, 31, 32, 133, 160, 5760, "
+                   "8192, 8193, 8194, 8195, 8196, 8197, 8198, 8199, 8200, 8201, 8202, "
+                   "8232, 8233, 8239, 8287, 12288)")
+
+
 def _get_connection(app_id: str) -> sqlite3.Connection:
     """
-    Open a connection to the app's database.
+    Get the connection to the app's database, opening it on first use.
 
     What's a "connection"?
     Think of it like opening a file. You open it, read/write, then close it.
     A database connection is the same — it's your open channel to the database.
+    Here we keep it open and reuse it, so helpers don't close it when they're done.
     """
+    # Keyed by app_id, so a cache hit skips _get_db_path (and its makedirs call) entirely.
+    # Each entry is (connection, generation) — see _generations.
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    generation = _generations.get(app_id, 0)
+    cached = conns.get(app_id)
+    if cached is not None:
+        conn, opened_in = cached
+        if opened_in == generation:
+            return conn
+        conn.close()  # The database was deleted since — drop the handle to the old file
+
     db_path = _get_db_path(app_id)
-    conn = sqlite3.connect(db_path)
+    # Room for every statement the helpers use, so none get evicted from the cache
+    conn = sqlite3.connect(db_path, cached_statements=256)
 
     # This makes SQLite return rows as dictionaries instead of plain tuples.
     # Without it: row = (1, "great app", 5)
     # With it:    row = {"id": 1, "text": "great app", "rating": 5}
     conn.row_factory = sqlite3.Row
 
+    # WAL lets readers proceed while a write is in progress. It's stored in the file
+    # itself, so it only needs setting once per database file per process — same for
+    # the indexes, which this also adds to databases created before they existed.
+    if db_path not in _prepared_files:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _create_indexes(conn.cursor())
+        conn.commit()
+        _prepared_files.add(db_path)
+
+    # The rest are per-connection: NORMAL sync is safe with WAL and skips an fsync per
+    # commit, temp tables/sorts stay in RAM, and mmap + a 64 MB page cache keep hot
+    # pages in memory. One executescript call instead of a round trip per PRAGMA.
+    conn.executescript("""
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+        PRAGMA cache_size=-65536;
+    """)
+
+    conns[app_id] = (conn, generation)
     return conn
 
 
+def close_app(app_id: str) -> None:
+    """Close and forget this thread's cached connection to the app's database, if any."""
+    cached = getattr(_local, "conns", {}).pop(app_id, None)
+    if cached is not None:
+        cached[0].close()
+
+
+def _create_indexes(cursor) -> None:
+    """Create any missing indexes from _INDEXES, skipping tables that don't exist yet."""
+    for table, ddl in _INDEXES.items():
+        if _table_exists(cursor, table):
+            cursor.execute(ddl)
+
+
 def initialize_database(app_id: str, app_name: str, store: str) -> None:
     """
     Creates all tables for a new app. Safe to call multiple times —
@@ -316,6 +519,9 @@ def initialize_database(app_id: str, app_name: str, store: str) -> None:
         )
     """)
 
+    # ---- Indexes ----
+    _create_indexes(cursor)
+
     # Insert initial metadata
     metadata_defaults = {
         "app_id": app_id,
@@ -326,14 +532,13 @@ def initialize_database(app_id: str, app_name: str, store: str) -> None:
         "total_reviews_stored": "0",
         "seagull_analysis_complete": "false",
     }
-    for key, value in metadata_defaults.items():
-        cursor.execute(
-            "INSERT OR IGNORE INTO app_metadata (key, value) VALUES (?, ?)",
-            (key, value)
-        )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO app_metadata (key, value) VALUES (?, ?)",
+        metadata_defaults.items()
+    )
 
     conn.commit()  # Save all changes to disk
-    conn.close()   # Close the connection
+    _sync_meta_sidecar(app_id)
 
     print(f"Database initialized for: {app_name} ({app_id})")
     print(f"Database file: {_get_db_path(app_id)}")
@@ -351,42 +556,106 @@ def store_reviews(app_id: str, reviews: list[Review]) -> int:
     conn = _get_connection(app_id)
     cursor = conn.cursor()
 
-    inserted = 0
-    for review in reviews:
+    # One explicit transaction around every insert plus the metadata update: BEGIN
+    # IMMEDIATE takes the write lock up front (so a concurrent reader can't make it
+    # fail halfway), and the whole batch lands with a single commit.
+    # Rows go in chunks of STORE_BATCH_SIZE with executemany — one call into SQLite
+    # per chunk instead of one per review. total_changes counts rows actually
+    # inserted, so ignored duplicates don't count.
+    # If the caller already has a transaction open on this (shared, per-thread)
+    # connection, nest inside it with a savepoint instead: this function only ever
+    # commits or rolls back what it started, never the caller's work.
+    own_transaction = not conn.in_transaction
+    conn.execute("BEGIN IMMEDIATE" if own_transaction else "SAVEPOINT store_reviews")
+    try:
+        changes_before = conn.total_changes
+        reviews_iter = iter(reviews)
+        while chunk := list(islice(reviews_iter, STORE_BATCH_SIZE)):
+            rows = [
+                (
+                    review.review_id,
+                    review.source,
+                    review.rating,
+                    review.text,
+                    review.date.isoformat(),   # Store dates as ISO strings (e.g., "2026-01-15T10:30:00")
+                    review.username,
+                    review.thumbs_up,
+                )
+                for review in chunk
+            ]
+            try:
+                cursor.executemany(_INSERT_REVIEW_SQL, rows)
+            except sqlite3.Error:
+                # A bad row fails the whole chunk — retry it row by row to skip only that review
+                for row in rows:
+                    try:
+                        cursor.execute(_INSERT_REVIEW_SQL, row)
+                    except sqlite3.Error as e:
+                        print(f"  Error storing review {row[0]}: {e}")
+        inserted = conn.total_changes - changes_before
+
+        # Update total count in metadata — a running counter (previous total + what
+        # this call inserted), so no COUNT(*) scan of the whole table per ingest.
+        # Falls back to counting if the stored value is missing or unreadable.
+        cursor.execute("SELECT value FROM app_metadata WHERE key = 'total_reviews_stored'")
+        row = cursor.fetchone()
         try:
-            cursor.execute("""
-                INSERT OR IGNORE INTO reviews
-                (review_id, source, rating, text, date, username, thumbs_up)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                review.review_id,
-                review.source,
-                review.rating,
-                review.text,
-                review.date.isoformat(),   # Store dates as ISO strings (e.g., "2026-01-15T10:30:00")
-                review.username,
-                review.thumbs_up
-            ))
-            if cursor.rowcount > 0:
-                inserted += 1
-        except sqlite3.Error as e:
-            print(f"  Error storing review {review.review_id}: {e}")
-
-    # Update total count in metadata
-    cursor.execute("SELECT COUNT(*) FROM reviews")
-    total = cursor.fetchone()[0]
-    cursor.execute(
-        "UPDATE app_metadata SET value = ? WHERE key = 'total_reviews_stored'",
-        (str(total),)
-    )
-
-    conn.commit()
-    conn.close()
+            total = int(row[0]) + inserted
+        except (TypeError, ValueError):
+            cursor.execute("SELECT COUNT(*) FROM reviews")
+            total = cursor.fetchone()[0]
+        cursor.execute(
+            "UPDATE app_metadata SET value = ? WHERE key = 'total_reviews_stored'",
+            (str(total),)
+        )
+        if own_transaction:
+            conn.commit()
+        else:
+            conn.execute("RELEASE SAVEPOINT store_reviews")  # Kept; the caller commits it
+    except Exception:
+        # Nothing half-stored, and the shared connection isn't left mid-transaction
+        if own_transaction:
+            conn.rollback()
+        else:
+            conn.execute("ROLLBACK TO SAVEPOINT store_reviews")
+            conn.execute("RELEASE SAVEPOINT store_reviews")
+        raise
+    if own_transaction:
+        _sync_meta_sidecar(app_id)  # total_reviews_stored changed (a caller's transaction syncs after its commit)
 
     print(f"Stored {inserted} new reviews ({len(reviews) - inserted} duplicates skipped)")
     return inserted
 
 
+def _end_bound(end_date: str) -> str:
+    """
+    Exclusive upper bound for an inclusive end date: "2025-06-30" → "2025-07-01".
+
+    Review dates are stored with a time ("2025-06-30T14:05:00"), which sorts AFTER
+    the bare "2025-06-30" — so `date <= end_date` would silently drop the whole
+    last day. Queries use `date >= start AND date < day after end` instead: a
+    half-open range that covers every timestamp of the last day and maps straight
+    onto the date index.
+    """
+    return (date.fromisoformat(end_date[:10]) + timedelta(days=1)).isoformat()
+
+
+def get_existing_review_ids(app_id: str) -> set[str]:
+    """
+    All review IDs already stored for an app, as a set for fast membership tests.
+    The scrapers use it to skip reviews we already have before building Review
+    objects for them. An app with no database yet has none (and no file is created).
+    """
+    if not os.path.exists(_get_db_path(app_id)):
+        return set()
+    conn = _get_connection(app_id)
+    cursor = conn.cursor()
+    if not _has_table(app_id, cursor, "reviews"):
+        return set()
+    cursor.execute("SELECT review_id FROM reviews")
+    return {row[0] for row in cursor}
+
+
 def count_reviews_for_period(app_id: str, start_date: str, end_date: str) -> int:
     """
     Count how many reviews exist in the database for a given date range.
@@ -394,59 +663,166 @@ def count_reviews_for_period(app_id: str, start_date: str, end_date: str) -> int
     """
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    if not _table_exists(cursor, "reviews"):
-        conn.close()
+    if not _has_table(app_id, cursor, "reviews"):
         return 0
     cursor.execute(
-        "SELECT COUNT(*) FROM reviews WHERE date >= ? AND date <= ?",
-        (start_date, end_date)
+        "SELECT COUNT(*) FROM reviews WHERE date >= ? AND date < ?",
+        (start_date, _end_bound(end_date))
     )
     count = cursor.fetchone()[0]
-    conn.close()
     return count
 
 
+def count_reviews_by_month(app_id: str, start_date: str, end_date: str) -> dict[str, int]:
+    """
+    Count reviews per month for a date range, in one query.
+
+    Returns {"2025-06": 412, "2025-07": 388, ...} — months with no reviews are left out.
+    Cheaper than calling count_reviews_for_period once per month: SQLite scans the
+    range once and buckets by the "YYYY-MM" prefix of the ISO date.
+    """
+    conn = _get_connection(app_id)
+    cursor = conn.cursor()
+    if not _has_table(app_id, cursor, "reviews"):
+        return {}
+    cursor.execute(
+        "SELECT substr(date, 1, 7) AS month, COUNT(*) FROM reviews "
+        "WHERE date >= ? AND date < ? GROUP BY month",
+        (start_date, _end_bound(end_date))
+    )
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def get_rating_stats(app_id: str, start_date: str, end_date: str) -> dict:
+    """
+    Rating statistics for a date range, computed by SQLite in one query.
+
+    Same result as processor.compute_rating_stats, but the reviews are counted
+    where they live — no rows are turned into Python dicts just to be counted.
+    Used for quarters and years, which need stats but never the review text.
+    """
+    conn = _get_connection(app_id)
+    cursor = conn.cursor()
+    if not _has_table(app_id, cursor, "reviews"):
+        return {}
+
+    # Comparisons are 0/1 in SQLite, so SUM(rating = 1) counts the 1-star reviews.
+    # A review "has text" if anything is left once _WHITESPACE_SQL is trimmed — the
+    # same test as compute_rating_stats' `not text.isspace()`.
+    cursor.execute(f"""
+        SELECT COUNT(*), AVG(rating),
+               SUM(rating = 1), SUM(rating = 2), SUM(rating = 3),
+               SUM(rating = 4), SUM(rating = 5),
+               SUM(text IS NOT NULL AND length(trim(text, {_WHITESPACE_SQL})) > 0)
+        FROM reviews
+        WHERE date >= ? AND date < ?
+    """, (start_date, _end_bound(end_date)))
+    total, avg, r1, r2, r3, r4, r5, with_text = cursor.fetchone()
+    if not total:
+        return {}
+
+    return {
+        "total_reviews": total,
+        "avg_rating": round(avg, 2),
+        "rating_1": r1,
+        "rating_2": r2,
+        "rating_3": r3,
+        "rating_4": r4,
+        "rating_5": r5,
+        "reviews_with_text": with_text,
+        "reviews_without_text": total - with_text,
+    }
+
+
 def get_review_date_range(app_id: str) -> tuple:
     """Get the earliest and latest review dates for an app."""
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    if not _table_exists(cursor, "reviews"):
-        conn.close()
+    if not _has_table(app_id, cursor, "reviews"):
         return None, None
     cursor.execute("SELECT MIN(date), MAX(date) FROM reviews")
     row = cursor.fetchone()
-    conn.close()
     return row[0], row[1]
 
 
-def get_reviews_for_period(app_id: str, start_date: str, end_date: str) -> list[dict]:
+def iter_reviews_for_period(app_id: str, start_date: str, end_date: str,
+                            limit: Optional[int] = None, offset: int = 0) -> Iterator[dict]:
     """
-    Retrieve reviews within a date range.
+    Stream reviews within a date range, one dict at a time.
     This is what both agents use to pull reviews for analysis.
 
     Args:
         start_date: ISO format date string (e.g., "2025-06-01")
         end_date:   ISO format date string (e.g., "2025-06-30")
+        limit:      Optional page size (None = every review in the range)
+        offset:     Rows to skip before the page starts (used with limit)
+
+    Yields:
+        Review dictionaries, oldest first.
 
-    Returns:
-        List of review dictionaries.
+    Only the columns the analysis uses are selected (not SELECT *), and rows are
+    yielded as SQLite steps through the result — a caller that reads sequentially
+    never holds the whole month in memory.
     """
     conn = _get_connection(app_id)
     cursor = conn.cursor()
 
-    if not _table_exists(cursor, "reviews"):
-        conn.close()
-        return []
+    if not _has_table(app_id, cursor, "reviews"):
+        return
 
-    cursor.execute("""
-        SELECT * FROM reviews
-        WHERE date >= ? AND date <= ?
-        ORDER BY date ASC
-    """, (start_date, end_date))
+    end_bound = _end_bound(end_date)
+    if limit is None:
+        cursor.execute(_SELECT_REVIEWS_SQL, (start_date, end_bound))
+    else:
+        cursor.execute(_SELECT_REVIEWS_PAGE_SQL, (start_date, end_bound, limit, offset))
+    for row in cursor:
+        yield dict(row)
 
-    rows = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return rows
+
+def get_reviews_for_period(app_id: str, start_date: str, end_date: str) -> list[dict]:
+    """
+    Retrieve reviews within a date range as a list.
+    Thin wrapper around iter_reviews_for_period for callers that need len()
+    or more than one pass over the reviews.
+    """
+    return list(iter_reviews_for_period(app_id, start_date, end_date))
+
+
+def get_review_batch_json(app_id: str, start_date: str, end_date: str,
+                          limit: int = 200) -> tuple[str, int]:
+    """
+    Build the LLM's review batch for a date range directly in SQLite.
+
+    Returns (json_array, count): a JSON array string of {"rating", "text"} objects
+    (text cut to 500 characters) for the first `limit` reviews with real text, and
+    how many reviews it holds.
+
+    json_group_array/json_object assemble the whole payload inside SQLite — one
+    round trip and one string, instead of a Python dict and an f-string per review.
+    """
+    conn = _get_connection(app_id)
+    cursor = conn.cursor()
+
+    if not _has_table(app_id, cursor, "reviews"):
+        return "[]", 0
+
+    # trim() with _WHITESPACE_SQL strips exactly what Python's str.strip() does.
+    # review_id breaks ties between same-timestamp reviews, so the same period always
+    # produces byte-identical JSON (stable LLM cache keys and prompt prefixes).
+    cursor.execute(f"""
+        SELECT json_group_array(json_object('rating', rating, 'text', substr(text, 1, 500))),
+               COUNT(*)
+        FROM (
+            SELECT rating, text FROM reviews
+            WHERE date >= ? AND date < ?
+              AND text IS NOT NULL
+              AND length(trim(text, {_WHITESPACE_SQL})) > 3
+            ORDER BY date ASC, review_id ASC
+            LIMIT ?
+        )
+    """, (start_date, _end_bound(end_date), limit))
+    reviews_json, count = cursor.fetchone()
+    return reviews_json, count
 
 
 def store_period_analysis(app_id: str, analysis: dict) -> None:
@@ -458,30 +834,22 @@ def store_period_analysis(app_id: str, analysis: dict) -> None:
     conn = _get_connection(app_id)
     cursor = conn.cursor()
 
-    cursor.execute("""
-        INSERT OR REPLACE INTO period_analysis
-        (period_type, period_label, period_start, period_end,
-         total_reviews, rating_1, rating_2, rating_3, rating_4, rating_5,
-         avg_rating, reviews_with_text, reviews_without_text)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        analysis["period_type"],
-        analysis["period_label"],
-        analysis["period_start"],
-        analysis["period_end"],
-        analysis["total_reviews"],
-        analysis["rating_1"],
-        analysis["rating_2"],
-        analysis["rating_3"],
-        analysis["rating_4"],
-        analysis["rating_5"],
-        analysis["avg_rating"],
-        analysis["reviews_with_text"],
-        analysis["reviews_without_text"],
-    ))
-
-    conn.commit()
-    conn.close()
+    with conn:  # Commits on success, rolls back if anything raises
+        cursor.execute(_INSERT_PERIOD_ANALYSIS_SQL, (
+            analysis["period_type"],
+            analysis["period_label"],
+            analysis["period_start"],
+            analysis["period_end"],
+            analysis["total_reviews"],
+            analysis["rating_1"],
+            analysis["rating_2"],
+            analysis["rating_3"],
+            analysis["rating_4"],
+            analysis["rating_5"],
+            analysis["avg_rating"],
+            analysis["reviews_with_text"],
+            analysis["reviews_without_text"],
+        ))
 
 
 def store_themes(app_id: str, period_type: str, period_label: str, themes: list[dict]) -> None:
@@ -492,19 +860,10 @@ def store_themes(app_id: str, period_type: str, period_label: str, themes: list[
     conn = _get_connection(app_id)
     cursor = conn.cursor()
 
-    # Remove old themes for this period (so re-analysis overwrites cleanly)
-    cursor.execute(
-        "DELETE FROM themes WHERE period_type = ? AND period_label = ?",
-        (period_type, period_label)
-    )
-
-    for theme in themes:
-        cursor.execute("""
-            INSERT INTO themes
-            (period_type, period_label, theme, sentiment, mention_count,
-             sample_reviews, confidence)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
+    # Build every row (JSON-encoding the samples) before touching the database,
+    # then insert them with one executemany: the INSERT is prepared once and just re-bound per theme
+    rows = [
+        (
             period_type,
             period_label,
             theme["theme"],
@@ -513,37 +872,91 @@ def store_themes(app_id: str, period_type: str, period_label: str, themes: list[
             # Convert list to JSON string — SQLite can only store simple types
             json.dumps(theme.get("sample_reviews", [])) if isinstance(theme.get("sample_reviews"), list) else str(theme.get("sample_reviews", "")),
             theme.get("confidence", 0.0),
-        ))
+        )
+        for theme in themes
+    ]
 
-    conn.commit()
-    conn.close()
+    with conn:  # Commits on success, rolls back if anything raises
+        # Remove old themes for this period (so re-analysis overwrites cleanly)
+        cursor.execute(
+            "DELETE FROM themes WHERE period_type = ? AND period_label = ?",
+            (period_type, period_label)
+        )
+        cursor.executemany(_INSERT_THEME_SQL, rows)
 
 
 def update_metadata(app_id: str, key: str, value: str) -> None:
     """Update a single metadata value."""
+    update_metadata_values(app_id, {key: value})
+
+
+def update_metadata_values(app_id: str, values: dict[str, str]) -> None:
+    """
+    Set several metadata values in one transaction (and one sidecar refresh).
+
+    Each key is an upsert — INSERT ... ON CONFLICT DO UPDATE — so a key that
+    isn't there yet gets created instead of the write silently doing nothing.
+    """
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE app_metadata SET value = ? WHERE key = ?",
-        (value, key)
-    )
-    conn.commit()
-    conn.close()
+    with conn:  # Commits on success, rolls back if anything raises
+        cursor.executemany(
+            "INSERT INTO app_metadata (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            values.items()
+        )
+    _sync_meta_sidecar(app_id)
 
 
 def get_metadata(app_id: str) -> dict:
     """Get all metadata for an app as a dictionary."""
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    if not _table_exists(cursor, "app_metadata"):
-        conn.close()
+    if not _has_table(app_id, cursor, "app_metadata"):
         return {}
     cursor.execute("SELECT key, value FROM app_metadata")
     result = {row["key"]: row["value"] for row in cursor.fetchall()}
-    conn.close()
     return result
 
 
+def get_app_summary(app_id: str) -> dict:
+    """
+    Metadata plus the review date range, in one query.
+    Same dict as get_metadata, with "min_review_date" and "max_review_date" added
+    (None when there are no reviews). Returns {} if the app has no metadata yet.
+    """
+    conn = _get_connection(app_id)
+    cursor = conn.cursor()
+    if not _has_table(app_id, cursor, "app_metadata"):
+        return {}
+    if not _has_table(app_id, cursor, "reviews"):
+        summary = get_metadata(app_id)
+        summary.update(min_review_date=None, max_review_date=None)
+        return summary
+    # The date range rides along as two extra key/value rows
+    cursor.execute("""
+        SELECT key, value FROM app_metadata
+        UNION ALL SELECT 'min_review_date', MIN(date) FROM reviews
+        UNION ALL SELECT 'max_review_date', MAX(date) FROM reviews
+    """)
+    return {row["key"]: row["value"] for row in cursor.fetchall()}
+
+
+def _has_table(app_id: str, cursor, table_name: str) -> bool:
+    """
+    Like _table_exists, but answered from _schema_cache after the first lookup.
+
+    Read helpers call this before every query; without the cache each call would
+    be an extra sqlite_master query. A table that isn't cached yet triggers one
+    fresh read of the whole table list, so tables created later are picked up.
+    """
+    tables = _schema_cache.get(app_id)
+    if tables is None or table_name not in tables:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = _schema_cache[app_id] = {row[0] for row in cursor.fetchall()}
+    return table_name in tables
+
+
 def _table_exists(cursor, table_name: str) -> bool:
     """Check if a table exists in the database."""
     cursor.execute(
@@ -562,8 +975,7 @@ def get_all_period_analyses(app_id: str, period_type: Optional[str] = None) -> l
     conn = _get_connection(app_id)
     cursor = conn.cursor()
 
-    if not _table_exists(cursor, "period_analysis"):
-        conn.close()
+    if not _has_table(app_id, cursor, "period_analysis"):
         return []
 
     if period_type:
@@ -574,22 +986,51 @@ def get_all_period_analyses(app_id: str, period_type: Optional[str] = None) -> l
     else:
         cursor.execute("SELECT * FROM period_analysis ORDER BY period_start ASC")
 
-    rows = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    rows = [dict(row) for row in cursor]  # Stream rows, no intermediate fetchall() list
     return rows
 
 
+def _parse_theme_row(row) -> dict:
+    """Theme row as a dict, with sample_reviews decoded from JSON into a list."""
+    theme = dict(row)
+    try:
+        theme["sample_reviews"] = json.loads(theme.get("sample_reviews") or "[]")
+    except (TypeError, json.JSONDecodeError):
+        theme["sample_reviews"] = []
+    return theme
+
+
 def get_themes_for_period(app_id: str, period_type: str, period_label: str) -> list[dict]:
-    """Get themes for a specific period."""
+    """Get themes for a specific period. sample_reviews comes back as a list."""
     conn = _get_connection(app_id)
     cursor = conn.cursor()
-    if not _table_exists(cursor, "themes"):
-        conn.close()
+    if not _has_table(app_id, cursor, "themes"):
         return []
     cursor.execute(
         "SELECT * FROM themes WHERE period_type = ? AND period_label = ? ORDER BY mention_count DESC",
         (period_type, period_label)
     )
-    rows = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    rows = [_parse_theme_row(row) for row in cursor.fetchall()]
+    return rows
+
+
+def get_themes_for_periods(app_id: str, period_type: str, period_labels: list[str]) -> list[dict]:
+    """
+    Get themes for several periods in one query instead of one query per period.
+    Rows are ordered by period, then mention count — callers group them by period_label.
+    sample_reviews comes back as a list.
+    """
+    if not period_labels:
+        return []
+    conn = _get_connection(app_id)
+    cursor = conn.cursor()
+    if not _has_table(app_id, cursor, "themes"):
+        return []
+    placeholders = ",".join("?" * len(period_labels))
+    cursor.execute(
+        f"SELECT * FROM themes WHERE period_type = ? AND period_label IN ({placeholders}) "
+        "ORDER BY period_label ASC, mention_count DESC",
+        (period_type, *period_labels)
+    )
+    rows = [_parse_theme_row(row) for row in cursor]  # Stream rows, no intermediate fetchall() list
     return rows
@@ -0,0 +1,74 @@
+"""
+LLM response cache — never pay twice for the same prompt.
+
+Theme extraction is the expensive step: every month costs an LLM call. Re-running
+an analysis (a retry after a crash, an overlapping date range) sends exactly the
+same prompts again. This keeps each answer on disk, keyed by a hash
+of everything that shapes it — model, temperature, system prompt, user prompt —
+so a repeat is a local lookup instead of another paid call.
+
+Change the prompt (or the reviews in it, or the model) and the key changes with
+it: there is nothing to invalidate by hand. A forced re-run (run_analysis with
+force_rerun=True) skips the lookups and stores the fresh answers over the old ones.
+
+Stored in a small SQLite file of its own, shared by every app.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from app.config import LLM_CACHE_PATH
+
+# Hit/miss counts since the process started (run_analysis reports them per run)
+stats = {"hits": 0, "misses": 0}
+
+# One connection shared by all threads (months are analyzed in parallel), so every
+# access goes through this lock
+_lock = threading.Lock()
+_conn = None
+
+
+def make_key(*parts: str) -> str:
+    """Hash the inputs that determine an answer into a short cache key."""
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Open the cache database on first use. Call with _lock held."""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        _conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key         TEXT PRIMARY KEY,
+                value       TEXT NOT NULL,
+                created_at  TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        _conn.commit()
+    return _conn
+
+
+def get(key: str) -> Optional[dict]:
+    """Return the cached response for this key, or None if it was never stored."""
+    with _lock:
+        row = _get_conn().execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        stats["hits" if row else "misses"] += 1
+    return json.loads(row[0]) if row else None
+
+
+def put(key: str, value: dict) -> None:
+    """Store a response under this key (replacing any older one)."""
+    with _lock:
+        conn = _get_conn()
+        with conn:  # Commits on success, rolls back if anything raises
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
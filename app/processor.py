@@ -12,16 +12,29 @@ Key design decisions:
 """
 
 import json
-from datetime import datetime, timedelta
-from collections import Counter
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import islice
 import math
+from bisect import bisect_right
+from collections import defaultdict
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Optional
 
-from app.llm_client import call_llm
+import numpy as np
+
+from app.config import THEME_CLUSTERING
+from app import llm_cache
+from app.llm_client import call_llm, DEFAULT_MODEL
 from app.database import (
-    get_reviews_for_period,
+    iter_reviews_for_period,
+    get_review_batch_json,
+    get_rating_stats,
     store_period_analysis,
     store_themes,
-    update_metadata,
+    update_metadata_values,
     get_metadata,
     get_analyzed_months,
     aggregate_themes_from_monthly,
@@ -31,6 +44,10 @@ from app.database import (
 # PART 1: Pure statistics (no LLM needed)
 # ============================================================
 
+# Star value of each bincount slot (slot 0 is unused — ratings are 1-5)
+_STAR_VALUES = np.arange(6)
+
+
 def compute_rating_stats(reviews: list[dict]) -> dict:
     """
     Calculate rating distribution from a list of reviews.
@@ -50,19 +67,24 @@ def compute_rating_stats(reviews: list[dict]) -> dict:
             "reviews_with_text": 0, "reviews_without_text": 0,
         }
 
-    ratings = [r["rating"] for r in reviews]
-    rating_counts = Counter(ratings)
+    # One pass to pull ratings into a numpy array; counting then runs in C instead
+    # of looping over dicts again. The average comes from the 6 counts (stars × count),
+    # not from a second pass over every rating.
+    ratings = np.fromiter((r["rating"] for r in reviews), dtype=np.int8, count=total)
+    rating_counts = np.bincount(ratings, minlength=6)
+    avg_rating = float(_STAR_VALUES @ rating_counts) / total
 
-    with_text = sum(1 for r in reviews if r.get("text") and len(r["text"].strip()) > 0)
+    # Look each text up once, then test it — isspace() avoids building a stripped copy
+    with_text = sum(1 for t in (r.get("text") for r in reviews) if t and not t.isspace())
 
     return {
         "total_reviews": total,
-        "avg_rating": round(sum(ratings) / total, 2),
-        "rating_1": rating_counts.get(1, 0),
-        "rating_2": rating_counts.get(2, 0),
-        "rating_3": rating_counts.get(3, 0),
-        "rating_4": rating_counts.get(4, 0),
-        "rating_5": rating_counts.get(5, 0),
+        "avg_rating": round(avg_rating, 2),
+        "rating_1": int(rating_counts[1]),
+        "rating_2": int(rating_counts[2]),
+        "rating_3": int(rating_counts[3]),
+        "rating_4": int(rating_counts[4]),
+        "rating_5": int(rating_counts[5]),
         "reviews_with_text": with_text,
         "reviews_without_text": total - with_text,
     }
@@ -95,9 +117,41 @@ def check_statistical_significance(count: int, total: int, min_sample: int = 5)
 # PART 2: LLM-powered analysis (the expensive, intelligent part)
 # ============================================================
 
+def _call_llm_cached(system_prompt: str, user_prompt: str, temperature: float = 0.1,
+                     is_complete: Optional[Callable[[dict], bool]] = None,
+                     use_cache: bool = True) -> dict:
+    """
+    call_llm for the analysis prompts, through the on-disk response cache.
+
+    An identical prompt (same reviews, same instructions, same model) returns the
+    stored answer instead of paying for another call — re-runs and retries are free.
+    Failed responses (invalid JSON) aren't cached, so they get retried next time.
+    Neither are answers that `is_complete` (if given) rejects — e.g. a multi-period
+    answer missing one of its batches — so a partial answer is never replayed.
+
+    use_cache=False (a forced re-run) skips the lookup and always asks the model,
+    but still stores the fresh answer, replacing the old one.
+    """
+    key = llm_cache.make_key(DEFAULT_MODEL, str(temperature), system_prompt, user_prompt)
+    cached = llm_cache.get(key) if use_cache else None
+    if cached is not None and (is_complete is None or is_complete(cached)):
+        print("    (LLM response served from cache)")
+        return cached
+
+    result = call_llm(system_prompt=system_prompt, user_prompt=user_prompt, temperature=temperature)
+    if isinstance(result, dict) and "error" not in result and (is_complete is None or is_complete(result)):
+        llm_cache.put(key, result)
+    return result
+
+
 # This is the SYSTEM PROMPT — the "job description" for the LLM.
 # Notice how precisely it's written. Every sentence constrains the model.
 # This is context engineering in action.
+#
+# Keep it a fixed string (nothing interpolated into it): it's the first thing in
+# every request, and the provider caches a repeated prompt prefix — identical bytes
+# up front are served from that cache, cheaper and faster. Everything that changes
+# per call goes in the user prompt, after it.
 
 THEME_EXTRACTION_SYSTEM_PROMPT = """You are a rigorous app review analyst. Your job is to extract themes (topics) from user reviews.
 
@@ -139,7 +193,34 @@ Respond in this exact JSON format:
 }"""
 
 
-def extract_themes_from_batch(reviews: list[dict], min_sample: int = 3) -> dict:
+def _has_body(text) -> bool:
+    """
+    True if a review has enough text to analyze: more than 3 characters once
+    surrounding whitespace is ignored (same rule as get_review_batch_json's SQL).
+    The length check first skips strip() for short texts, and strip() returns the
+    string itself — no copy — when there's nothing to remove.
+    """
+    return bool(text) and len(text) > 3 and len(text.strip()) > 3
+
+
+# Max text reviews sent to the LLM per period (one call)
+THEME_BATCH_SIZE = 200
+
+# Same rules, for a prompt that carries several periods' batches at once
+# (extract_themes_multi_period). It starts with the single-batch prompt word for word.
+MULTI_PERIOD_SYSTEM_PROMPT = THEME_EXTRACTION_SYSTEM_PROMPT + """
+
+When the reviews come in several labelled batches (e.g. one per month), analyze every batch
+on its own — never merge themes or counts across batches — and wrap the results like this:
+{
+    "batches": {
+        "<batch label>": { ...one result in the JSON format above... }
+    }
+}"""
+
+
+def extract_themes_from_batch(reviews: Iterable[dict], min_sample: int = 3,
+                              use_cache: bool = True) -> dict:
     """
     Send a batch of text reviews to the LLM for theme extraction.
 
@@ -153,41 +234,230 @@ def extract_themes_from_batch(reviews: list[dict], min_sample: int = 3) -> dict:
     3. Produce worse results (too much noise, model loses focus)
 
     Typical batch size: 100-200 reviews. Enough signal, manageable context.
+
+    `reviews` can be a list or a stream (e.g. iter_reviews_for_period) — only the
+    first THEME_BATCH_SIZE text reviews are ever pulled from it.
     """
 
-    # Build the user prompt with the actual review data
-    # Only include reviews that have text (ratings-only reviews have no themes)
-    text_reviews = [r for r in reviews if r.get("text") and len(r["text"].strip()) > 3]
+    # Only include reviews that have text (ratings-only reviews have no themes).
+    # islice stops the filter as soon as the batch is full — no need to scan the rest.
+    text_reviews = list(islice(
+        (r for r in reviews if _has_body(r.get("text"))),
+        THEME_BATCH_SIZE,
+    ))
 
     if not text_reviews:
         return {"themes": [], "total_reviews_analyzed": 0, "reviews_with_no_clear_theme": 0}
 
-    # Format reviews for the LLM
-    # We include rating + text so the model knows the sentiment context
-    formatted = []
-    for i, r in enumerate(text_reviews[:200]):  # Cap at 200 per batch
-        formatted.append(f"[Review {i+1}] Rating: {r['rating']}/5 | \"{r['text'][:500]}\"")
+    # Same JSON shape get_review_batch_json builds in SQL: rating + text, so the
+    # model knows the sentiment context
+    reviews_json = json.dumps(
+        [{"rating": r["rating"], "text": r["text"][:500]} for r in text_reviews],
+        ensure_ascii=False,
+    )
+    return _extract_themes_from_json(reviews_json, len(text_reviews), min_sample, use_cache)
+
+
+def extract_themes_for_period(app_id: str, start_date: str, end_date: str,
+                              min_sample: int = 3, use_cache: bool = True) -> dict:
+    """
+    Theme extraction for one period, with the review batch built by SQLite.
 
-    user_prompt = f"""Analyze these {len(formatted)} app reviews and extract the main themes.
+    Same result as extract_themes_from_batch, but the filtering, truncation and
+    JSON formatting all happen in one query (get_review_batch_json) — the
+    reviews never become Python dicts or f-strings on the way to the prompt.
+    """
+    reviews_json, review_count = get_review_batch_json(
+        app_id, start_date, end_date, limit=THEME_BATCH_SIZE
+    )
+    if review_count == 0:
+        return {"themes": [], "total_reviews_analyzed": 0, "reviews_with_no_clear_theme": 0}
+
+    return _extract_themes_from_json(reviews_json, review_count, min_sample, use_cache)
+
+
+def extract_themes_multi_period(batches: list[tuple[str, str, int]],
+                                min_sample: int = 3, use_cache: bool = True) -> dict[str, dict]:
+    """
+    Theme extraction for several periods in ONE LLM call.
+
+    Every call repeats the same long system prompt; a single call per month pays
+    for it every month. Here a few months share one prompt, each as a labelled
+    batch, and the model answers per batch.
+
+    Args:
+        batches: list of (period_label, reviews_json, review_count), where
+                 reviews_json is a JSON array as built by get_review_batch_json.
+
+    Returns:
+        {period_label: result} — each result shaped like extract_themes_from_batch's.
+        A batch the model skipped, renamed or answered in the wrong shape is sent
+        again on its own (the single-batch prompt), so no month silently ends up
+        with no themes.
+    """
+    sections = "\n\n".join(
+        f"BATCH {label} ({count} reviews, JSON array of {{rating, text}}):\n{reviews_json}"
+        for label, reviews_json, count in batches
+    )
+    user_prompt = f"""Analyze each of these {len(batches)} batches of app reviews on its own and extract the main themes of each.
 Minimum sample size for a theme to be reported: {min_sample} mentions.
 
-REVIEWS:
-{chr(10).join(formatted)}"""
+{sections}"""
 
-    print(f"    Sending {len(formatted)} reviews to LLM for theme extraction...")
-    result = call_llm(
+    total = sum(count for _, _, count in batches)
+    print(f"    Sending {total} reviews from {len(batches)} periods to LLM for theme extraction...")
+    labels = [label for label, _, _ in batches]
+    result = _call_llm_cached(
+        system_prompt=MULTI_PERIOD_SYSTEM_PROMPT,
+        user_prompt=user_prompt,
+        temperature=0.1,
+        # Only a full answer is cached — a partial one would be replayed on every re-run
+        is_complete=lambda r: all(_batch_result(r, label) is not None for label in labels),
+        use_cache=use_cache,
+    )
+
+    themes_by_label = {}
+    for label, reviews_json, count in batches:
+        answer = _batch_result(result, label)
+        if answer is None:
+            print(f"    {label}: missing from the combined answer — asking for it on its own")
+            answer = _extract_themes_from_json(reviews_json, count, min_sample, use_cache)
+        themes_by_label[label] = answer
+    return themes_by_label
+
+
+def _batch_result(result: dict, label: str) -> Optional[dict]:
+    """One batch's answer from a multi-period response, or None if it isn't usable."""
+    batches = result.get("batches") if isinstance(result, dict) else None
+    answer = batches.get(label) if isinstance(batches, dict) else None
+    if isinstance(answer, dict) and isinstance(answer.get("themes"), list):
+        return answer
+    return None
+
+
+def _extract_themes_from_json(reviews_json: str, review_count: int, min_sample: int,
+                              use_cache: bool = True) -> dict:
+    """Build the user prompt around a JSON array of reviews and call the LLM."""
+    user_prompt = f"""Analyze these {review_count} app reviews and extract the main themes.
+Minimum sample size for a theme to be reported: {min_sample} mentions.
+
+REVIEWS (JSON array of {{rating, text}}):
+{reviews_json}"""
+
+    print(f"    Sending {review_count} reviews to LLM for theme extraction...")
+    result = _call_llm_cached(
         system_prompt=THEME_EXTRACTION_SYSTEM_PROMPT,
         user_prompt=user_prompt,
         temperature=0.1,  # Low temperature = consistent, analytical output
+        use_cache=use_cache,
     )
 
     return result
 
 
+# Local clustering takes over for months with more text reviews than this
+# (only when THEME_CLUSTERING is on and its packages are installed)
+CLUSTER_MIN_REVIEWS = 300
+
+CLUSTER_NAMING_SYSTEM_PROMPT = """You are a rigorous app review analyst. User reviews have already been grouped by topic.
+For each numbered group you get a few representative reviews. Name the theme the group is about.
+
+RULES — follow these exactly:
+1. Theme names MUST be lowercase, 2-4 words maximum (e.g., "app crashing", "slow loading", "great content").
+2. NEVER use filler words like "issues with", "problems with", "quality of". Go straight to the noun/verb.
+3. Classify each theme as "positive" or "negative" based on how users feel about it.
+4. If a group has no clear shared topic, leave it out.
+5. Do NOT invent themes. Only name what the reviews actually say.
+
+Respond in this exact JSON format:
+{
+    "themes": [
+        {
+            "group": group number,
+            "theme": "short descriptive name (2-4 words, lowercase)",
+            "sentiment": "positive" or "negative",
+            "confidence": 0.0 to 1.0
+        }
+    ]
+}"""
+
+
+def extract_themes_by_clustering(reviews: list[dict], use_cache: bool = True) -> dict:
+    """
+    Theme extraction for very large months: cluster locally, let the LLM name clusters.
+
+    Every text review is embedded and clustered (see app/theme_clustering.py), so
+    mention_count is the real number of reviews in each cluster — not an estimate
+    from a 200-review sample. The LLM gets one small prompt with a few
+    representative reviews per cluster, however big the month is.
+
+    Returns the same shape as extract_themes_from_batch.
+    """
+    from app.theme_clustering import cluster_texts, REPRESENTATIVES_PER_CLUSTER
+
+    texts = [r["text"][:500] for r in reviews]
+    print(f"    Clustering {len(texts)} reviews locally...")
+    clusters = cluster_texts(texts)
+    clustered = sum(len(members) for members in clusters)
+    if not clusters:
+        return {"themes": [], "total_reviews_analyzed": len(texts),
+                "reviews_with_no_clear_theme": len(texts)}
+
+    groups = "\n\n".join(
+        f"GROUP {g}:\n" + "\n".join(
+            f"- Rating: {reviews[i]['rating']}/5 | \"{texts[i]}\""
+            for i in members[:REPRESENTATIVES_PER_CLUSTER]
+        )
+        for g, members in enumerate(clusters, start=1)
+    )
+
+    print(f"    Asking LLM to name {len(clusters)} clusters...")
+    result = _call_llm_cached(
+        system_prompt=CLUSTER_NAMING_SYSTEM_PROMPT,
+        user_prompt=f"Name the theme of each of these {len(clusters)} review groups.\n\n{groups}",
+        temperature=0.1,
+        use_cache=use_cache,
+    )
+
+    themes = []
+    for named in result.get("themes", []):
+        g = named.get("group")
+        if not isinstance(g, int) or not 1 <= g <= len(clusters):
+            continue
+        members = clusters[g - 1]
+        themes.append({
+            "theme": named.get("theme", ""),
+            "sentiment": named.get("sentiment", "negative"),
+            "mention_count": len(members),
+            "sample_reviews": [texts[i] for i in members[:3]],
+            "confidence": named.get("confidence", 0.0),
+        })
+
+    return {
+        "themes": themes,
+        "total_reviews_analyzed": len(texts),
+        "reviews_with_no_clear_theme": len(texts) - clustered,
+    }
+
+
 # ============================================================
 # PART 3: Orchestration — month-by-month processing
 # ============================================================
 
+# Months that share one theme-extraction prompt (see process_periods)
+MONTHS_PER_PROMPT = 3
+
+# Month groups analyzed in parallel by run_analysis (bounded by the LLM provider's rate limits)
+MONTH_WORKERS = 8
+
+# Quarters/years summarized in parallel — database work only, so a few threads are plenty
+SUMMARY_WORKERS = 4
+
+# Months run in worker threads, each with its own SQLite connection. SQLite allows
+# only one writer at a time, so writes take turns here instead of waiting on (and
+# possibly timing out against) the database lock.
+_db_write_lock = threading.Lock()
+
 def get_month_ranges(start_date: str, end_date: str) -> list[tuple[str, str, str]]:
     """
     Split a date range into monthly chunks.
@@ -198,29 +468,24 @@ def get_month_ranges(start_date: str, end_date: str) -> list[tuple[str, str, str
          ("2025-07", "2025-07-01", "2025-07-31"),
          ("2025-08", "2025-08-01", "2025-08-31")]
     """
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
     months = []
 
-    current = start.replace(day=1)
-    while current <= end:
-        month_start = current.strftime("%Y-%m-%d")
-        # Get last day of month
-        if current.month == 12:
-            next_month = current.replace(year=current.year + 1, month=1)
-        else:
-            next_month = current.replace(month=current.month + 1)
-        month_end = (next_month - timedelta(days=1)).strftime("%Y-%m-%d")
-        label = current.strftime("%Y-%m")
-
-        months.append((label, month_start, month_end))
-        current = next_month
+    # Walk (year, month) pairs and format with f-strings — strftime and datetime
+    # arithmetic are the slow part of a loop like this. monthrange gives the last day.
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        label = f"{year:04d}-{month:02d}"
+        last_day = calendar.monthrange(year, month)[1]
+        months.append((label, f"{label}-01", f"{label}-{last_day:02d}"))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
 
     return months
 
 
 def process_period(app_id: str, period_type: str, period_label: str,
-                   start_date: str, end_date: str) -> dict:
+                   start_date: str, end_date: str, use_cache: bool = True) -> dict:
     """
     Full analysis pipeline for a single period.
     This is the core loop that runs for each month (or week, or quarter).
@@ -232,110 +497,181 @@ def process_period(app_id: str, period_type: str, period_label: str,
         4. Filter themes by statistical significance
         5. Store everything back to database
     """
+    results = process_periods(app_id, period_type, [(period_label, start_date, end_date)],
+                              use_cache=use_cache)
+    return results.get(period_label, {})
 
-    print(f"\n  Processing {period_type}: {period_label} ({start_date} to {end_date})")
 
-    # Step 1: Get reviews for this period
-    reviews = get_reviews_for_period(app_id, start_date, end_date)
-    print(f"    Found {len(reviews)} reviews")
+def process_periods(app_id: str, period_type: str,
+                    periods: list[tuple[str, str, str]],
+                    use_cache: bool = True) -> dict[str, dict]:
+    """
+    Same pipeline as process_period, for a small group of periods at once.
 
-    if not reviews:
-        print(f"    No reviews for this period. Skipping.")
-        return {}
+    Steps 1-2 (reviews + stats) run per period. Step 3 then sends all of the
+    group's review batches to the LLM in ONE prompt (extract_themes_multi_period),
+    so the long instructions are paid for once per group instead of once per month.
+    Steps 4-5 split the answer back up and store it per period.
 
-    # Step 2: Rating statistics (no LLM needed — pure math)
-    stats = compute_rating_stats(reviews)
-    stats.update({
-        "period_type": period_type,
-        "period_label": period_label,
-        "period_start": start_date,
-        "period_end": end_date,
-    })
-    store_period_analysis(app_id, stats)
-    print(f"    Rating stats: avg={stats['avg_rating']}, total={stats['total_reviews']}")
-
-    # Step 3: Theme extraction (LLM-powered)
-    text_reviews = [r for r in reviews if r.get("text") and len(r["text"].strip()) > 3]
-
-    themes_data = {"themes": []}
-    if text_reviews:
-        themes_data = extract_themes_from_batch(reviews)
-
-    # Step 4: Filter by statistical significance
-    significant_themes = []
-    for theme in themes_data.get("themes", []):
-        if check_statistical_significance(
-            theme.get("mention_count", 0),
-            len(text_reviews)
-        ):
-            significant_themes.append(theme)
-        else:
-            print(f"    Dropped theme '{theme.get('theme')}' — insufficient sample size "
-                  f"({theme.get('mention_count', 0)} mentions)")
-
-    # Step 5: Store themes
-    if significant_themes:
-        store_themes(app_id, period_type, period_label, significant_themes)
-        pos = [t for t in significant_themes if t["sentiment"] == "positive"]
-        neg = [t for t in significant_themes if t["sentiment"] == "negative"]
-        print(f"    Themes stored: {len(pos)} positive, {len(neg)} negative")
+    Args:
+        periods: list of (period_label, start_date, end_date)
+        use_cache: False to ask the LLM again even if it answered these prompts before
 
-    return {
-        "stats": stats,
-        "themes": significant_themes,
-    }
+    Returns:
+        {period_label: {"stats": ..., "themes": [...]}} — periods with no reviews are left out.
+    """
+    results = {}
+    themes_by_label = {}   # label → (themes_data, number of text reviews)
+    pending = []           # (label, start, end, text count) waiting for the shared LLM call
+
+    # Step 1: Get reviews for every period in the group — one query over the group's
+    # whole span, sorted into periods in Python, instead of one query per period
+    reviews_by_period = _bucket_by_period(
+        iter_reviews_for_period(app_id, min(p[1] for p in periods), max(p[2] for p in periods)),
+        periods,
+    )
+
+    for period_label, start_date, end_date in periods:
+        print(f"\n  Processing {period_type}: {period_label} ({start_date} to {end_date})")
+
+        reviews = reviews_by_period[period_label]
+        print(f"    Found {len(reviews)} reviews")
+
+        if not reviews:
+            print(f"    No reviews for this period. Skipping.")
+            continue
+
+        # Step 2: Rating statistics (no LLM needed — pure math)
+        stats = compute_rating_stats(reviews)
+        stats.update({
+            "period_type": period_type,
+            "period_label": period_label,
+            "period_start": start_date,
+            "period_end": end_date,
+        })
+        with _db_write_lock:
+            store_period_analysis(app_id, stats)
+        print(f"    Rating stats: avg={stats['avg_rating']}, total={stats['total_reviews']}")
+        results[period_label] = {"stats": stats, "themes": []}
+
+        # Step 3 (prep): which theme extraction this period needs
+        # Only the count is needed (for significance) unless clustering takes this month
+        text_count = sum(1 for r in reviews if _has_body(r.get("text")))
+        if THEME_CLUSTERING and text_count > CLUSTER_MIN_REVIEWS and _clustering_available():
+            text_reviews = [r for r in reviews if _has_body(r.get("text"))]
+            themes_by_label[period_label] = (extract_themes_by_clustering(text_reviews, use_cache), text_count)
+        elif text_count:
+            pending.append((period_label, start_date, end_date, text_count))
+
+    # Step 3: Theme extraction (LLM-powered) — one call for the whole group
+    if len(pending) == 1:
+        period_label, start_date, end_date, text_count = pending[0]
+        themes_by_label[period_label] = (
+            extract_themes_for_period(app_id, start_date, end_date, use_cache=use_cache), text_count
+        )
+    elif pending:
+        batches = [
+            (period_label, *get_review_batch_json(app_id, start_date, end_date, limit=THEME_BATCH_SIZE))
+            for period_label, start_date, end_date, _ in pending
+        ]
+        multi = extract_themes_multi_period(batches, use_cache=use_cache)
+        for period_label, _, _, text_count in pending:
+            themes_by_label[period_label] = (multi[period_label], text_count)
+
+    for period_label, (themes_data, text_count) in themes_by_label.items():
+        # Step 4: Filter by statistical significance
+        significant_themes = []
+        for theme in themes_data.get("themes", []):
+            if check_statistical_significance(
+                theme.get("mention_count", 0),
+                text_count
+            ):
+                significant_themes.append(theme)
+            else:
+                print(f"    {period_label}: dropped theme '{theme.get('theme')}' — insufficient sample size "
+                      f"({theme.get('mention_count', 0)} mentions)")
+
+        # Step 5: Store themes
+        if significant_themes:
+            with _db_write_lock:
+                store_themes(app_id, period_type, period_label, significant_themes)
+            pos = [t for t in significant_themes if t["sentiment"] == "positive"]
+            neg = [t for t in significant_themes if t["sentiment"] == "negative"]
+            print(f"    {period_label}: themes stored: {len(pos)} positive, {len(neg)} negative")
+        results[period_label]["themes"] = significant_themes
+
+    return results
+
+
+def _bucket_by_period(reviews: Iterable[dict],
+                      periods: list[tuple[str, str, str]]) -> dict[str, list[dict]]:
+    """
+    Sort reviews into the periods they fall in, in one pass.
+
+    Each review's day ("YYYY-MM-DD") is binary-searched against the sorted period
+    starts, then checked against that period's (inclusive) end — reviews in a gap
+    between periods are dropped. Every period gets a list, empty or not.
+    """
+    ordered = sorted(periods, key=lambda p: p[1])
+    starts = [start for _, start, _ in ordered]
+    buckets = {label: [] for label, _, _ in periods}
+
+    for review in reviews:
+        day = review["date"][:10]
+        i = bisect_right(starts, day) - 1
+        if i >= 0 and day <= ordered[i][2]:
+            buckets[ordered[i][0]].append(review)
+
+    return buckets
+
+
+@lru_cache(maxsize=1)
+def _clustering_available() -> bool:
+    """Check once whether the optional clustering packages are installed."""
+    from app.theme_clustering import is_available
+    if not is_available():
+        print("    THEME_CLUSTERING is on, but sentence-transformers/hdbscan aren't installed "
+              "— using the LLM-only path.")
+        return False
+    return True
 
 
 def get_year_ranges(start_date: str, end_date: str) -> list[tuple[str, str, str]]:
     """Split a date range into yearly chunks."""
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
-    years = []
-
-    current_year = start.year
-    while current_year <= end.year:
-        year_start = f"{current_year}-01-01"
-        year_end = f"{current_year}-12-31"
-        label = str(current_year)
-        years.append((label, year_start, year_end))
-        current_year += 1
+    first_year = date.fromisoformat(start_date).year
+    last_year = date.fromisoformat(end_date).year
+    years = [(str(year), f"{year}-01-01", f"{year}-12-31")
+             for year in range(first_year, last_year + 1)]
 
     return years
 
 
 def get_quarter_ranges(start_date: str, end_date: str) -> list[tuple[str, str, str]]:
     """Split a date range into quarterly chunks."""
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
     quarters = []
 
-    current = start.replace(day=1)
-    while current <= end:
-        q = (current.month - 1) // 3 + 1
-        q_start_month = (q - 1) * 3 + 1
-        q_end_month = q * 3
-        q_start = current.replace(month=q_start_month, day=1)
-        if q_end_month == 12:
-            q_end = datetime(current.year, 12, 31)
-        else:
-            q_end = datetime(current.year, q_end_month + 1, 1) - timedelta(days=1)
-
-        label = f"{current.year}-Q{q}"
-        quarters.append((label, q_start.strftime("%Y-%m-%d"), q_end.strftime("%Y-%m-%d")))
+    # Same (year, month) walk as get_month_ranges, jumping a quarter at a time
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        q = (month - 1) // 3 + 1
+        q_start_month, q_end_month = q * 3 - 2, q * 3
+        last_day = calendar.monthrange(year, q_end_month)[1]
+        quarters.append((f"{year}-Q{q}",
+                         f"{year:04d}-{q_start_month:02d}-01",
+                         f"{year:04d}-{q_end_month:02d}-{last_day:02d}"))
 
         # Move to next quarter
-        if q_end_month >= 12:
-            current = datetime(current.year + 1, 1, 1)
-        else:
-            current = datetime(current.year, q_end_month + 1, 1)
+        year, month = (year + 1, 1) if q == 4 else (year, q_end_month + 1)
 
     return quarters
 
 
 def get_week_ranges(start_date: str, end_date: str) -> list[tuple[str, str, str]]:
     """Split a date range into weekly chunks (Sunday to Saturday)."""
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
     weeks = []
 
     # Align to the nearest Sunday
@@ -343,10 +679,9 @@ def get_week_ranges(start_date: str, end_date: str) -> list[tuple[str, str, str]
     current = start - timedelta(days=days_since_sunday)
 
     while current <= end:
-        week_start = current
-        week_end = current + timedelta(days=6)  # Saturday
-        label = f"W{week_start.strftime('%Y-%m-%d')}"
-        weeks.append((label, week_start.strftime("%Y-%m-%d"), week_end.strftime("%Y-%m-%d")))
+        week_start = current.isoformat()
+        week_end = (current + timedelta(days=6)).isoformat()  # Saturday
+        weeks.append((f"W{week_start}", week_start, week_end))
         current += timedelta(days=7)
 
     return weeks
@@ -357,22 +692,34 @@ def process_period_stats_only(app_id: str, period_type: str, period_label: str,
     """
     Compute only rating statistics for a period (no LLM call).
     Used for quarterly/yearly where themes are aggregated from monthly.
+    The counting happens in SQL (get_rating_stats) — no need to load the reviews.
     """
-    reviews = get_reviews_for_period(app_id, start_date, end_date)
-    if not reviews:
+    stats = get_rating_stats(app_id, start_date, end_date)
+    if not stats:
         return {}
 
-    stats = compute_rating_stats(reviews)
     stats.update({
         "period_type": period_type,
         "period_label": period_label,
         "period_start": start_date,
         "period_end": end_date,
     })
-    store_period_analysis(app_id, stats)
+    with _db_write_lock:
+        store_period_analysis(app_id, stats)
     return stats
 
 
+def _summarize_period(app_id: str, period_type: str, period_label: str,
+                      start_date: str, end_date: str, month_labels: list[str]) -> None:
+    """One quarter or year: rating stats from SQL, themes aggregated from its months."""
+    process_period_stats_only(app_id, period_type, period_label, start_date, end_date)
+
+    agg_themes = aggregate_themes_from_monthly(app_id, period_type, period_label, month_labels)
+    if agg_themes:
+        with _db_write_lock:
+            store_themes(app_id, period_type, period_label, agg_themes)
+
+
 def run_analysis(app_id: str, start_date: str, end_date: str,
                  force_rerun: bool = False,
                  progress_callback=None) -> dict:
@@ -383,7 +730,8 @@ def run_analysis(app_id: str, start_date: str, end_date: str,
     - Checks which months are already analyzed
     - Only processes new/unanalyzed months with LLM
     - Quarterly and yearly themes are AGGREGATED from monthly (no extra LLM calls)
-    - force_rerun=True skips the duplicate check and re-analyzes everything
+    - force_rerun=True skips the duplicate check and re-analyzes everything,
+      asking the LLM again instead of replaying its cached answers
 
     Args:
         progress_callback: optional function(current_step, total_steps, message)
@@ -394,6 +742,8 @@ def run_analysis(app_id: str, start_date: str, end_date: str,
     print(f"Period: {start_date} to {end_date}")
     print("=" * 60)
 
+    cache_hits, cache_misses = llm_cache.stats["hits"], llm_cache.stats["misses"]
+
     # Determine which months need analysis
     months = get_month_ranges(start_date, end_date)
     already_analyzed = set(get_analyzed_months(app_id)) if not force_rerun else set()
@@ -404,62 +754,85 @@ def run_analysis(app_id: str, start_date: str, end_date: str,
     if months_skipped > 0:
         print(f"Skipping {months_skipped} already-analyzed months")
 
-    quarters = get_quarter_ranges(start_date, end_date)
-    years = get_year_ranges(start_date, end_date)
+    # Quarters and years, and which months make up each — all derived in one pass
+    # over the month labels rather than walking the date range twice more with
+    # get_quarter_ranges / get_year_ranges (same full calendar periods as those give).
+    # The loops below then look their months up instead of re-scanning the list.
+    quarters, years = [], []
+    months_by_quarter = defaultdict(list)
+    months_by_year = defaultdict(list)
+    for m_label, _, _ in months:
+        year, month = m_label[:4], int(m_label[5:7])
+        q = (month - 1) // 3 + 1
+        q_label = f"{year}-Q{q}"
+        if q_label not in months_by_quarter:
+            last_day = calendar.monthrange(int(year), q * 3)[1]
+            quarters.append((q_label, f"{year}-{q * 3 - 2:02d}-01", f"{year}-{q * 3:02d}-{last_day:02d}"))
+        if year not in months_by_year:
+            years.append((year, f"{year}-01-01", f"{year}-12-31"))
+        months_by_quarter[q_label].append(m_label)
+        months_by_year[year].append(m_label)
 
     # Total steps: new months (LLM) + all quarters (stats) + all years (stats)
     total_steps = len(months_to_analyze) + len(quarters) + len(years)
     current_step = 0
 
     # ---- Monthly: full LLM analysis only for new months ----
-    for i, (label, m_start, m_end) in enumerate(months_to_analyze):
-        current_step += 1
-        msg = f"Monthly: {label} ({current_step}/{total_steps})"
-        print(f"\n  {msg}")
-        if progress_callback:
-            progress_callback(current_step, total_steps, msg)
-        process_period(app_id, "monthly", label, m_start, m_end)
-
-    # ---- Quarterly: stats only + aggregate themes from monthly ----
-    for i, (label, q_start, q_end) in enumerate(quarters):
-        current_step += 1
-        msg = f"Quarterly: {label} ({current_step}/{total_steps})"
-        print(f"\n  {msg}")
-        if progress_callback:
-            progress_callback(current_step, total_steps, msg)
-
-        process_period_stats_only(app_id, "quarterly", label, q_start, q_end)
-
-        # Aggregate themes from the monthly analyses within this quarter
-        q_months = [m_label for m_label, m_start_d, m_end_d in months
-                     if m_start_d >= q_start and m_end_d <= q_end]
-        agg_themes = aggregate_themes_from_monthly(app_id, "quarterly", label, q_months)
-        if agg_themes:
-            store_themes(app_id, "quarterly", label, agg_themes)
-
-    # ---- Yearly: stats only + aggregate themes from monthly ----
-    for i, (label, y_start, y_end) in enumerate(years):
-        current_step += 1
-        msg = f"Yearly: {label} ({current_step}/{total_steps})"
-        print(f"\n  {msg}")
-        if progress_callback:
-            progress_callback(current_step, total_steps, msg)
-
-        process_period_stats_only(app_id, "yearly", label, y_start, y_end)
-
-        # Aggregate themes from all monthly analyses within this year
-        y_months = [m_label for m_label, m_start_d, m_end_d in months
-                     if m_start_d >= y_start and m_end_d <= y_end]
-        agg_themes = aggregate_themes_from_monthly(app_id, "yearly", label, y_months)
-        if agg_themes:
-            store_themes(app_id, "yearly", label, agg_themes)
+    # Months go to the LLM in groups of MONTHS_PER_PROMPT (one prompt per group),
+    # and each group is one slow, network-bound call, so the groups run side by side.
+    # Every job is submitted before any result is awaited (otherwise the groups
+    # would still run one at a time); progress is reported as each one finishes.
+    month_groups = [months_to_analyze[i:i + MONTHS_PER_PROMPT]
+                    for i in range(0, len(months_to_analyze), MONTHS_PER_PROMPT)]
+    if month_groups:
+        with ThreadPoolExecutor(max_workers=min(MONTH_WORKERS, len(month_groups))) as executor:
+            futures = {
+                executor.submit(process_periods, app_id, "monthly", group,
+                                use_cache=not force_rerun): group
+                for group in month_groups
+            }
+            for future in as_completed(futures):
+                future.result()  # Re-raise anything that went wrong in the worker
+                group = futures[future]
+                current_step += len(group)
+                labels = ", ".join(label for label, _, _ in group)
+                msg = f"Monthly: {labels} ({current_step}/{total_steps})"
+                print(f"\n  {msg}")
+                if progress_callback:
+                    progress_callback(current_step, total_steps, msg)
+
+    # ---- Quarterly + yearly: stats only + aggregate themes from monthly ----
+    # No LLM here, and no period depends on another (they all read the finished
+    # monthly results), so quarters and years share one small pool.
+    summaries = [("quarterly", "Quarterly", label, q_start, q_end, months_by_quarter[label])
+                 for label, q_start, q_end in quarters]
+    summaries += [("yearly", "Yearly", label, y_start, y_end, months_by_year[label])
+                  for label, y_start, y_end in years]
+    if summaries:
+        with ThreadPoolExecutor(max_workers=min(SUMMARY_WORKERS, len(summaries))) as executor:
+            futures = {
+                executor.submit(_summarize_period, app_id, period_type, label, p_start, p_end, p_months):
+                    f"{name}: {label}"
+                for period_type, name, label, p_start, p_end, p_months in summaries
+            }
+            for future in as_completed(futures):
+                future.result()  # Re-raise anything that went wrong in the worker
+                current_step += 1
+                msg = f"{futures[future]} ({current_step}/{total_steps})"
+                print(f"\n  {msg}")
+                if progress_callback:
+                    progress_callback(current_step, total_steps, msg)
 
     # Update metadata
-    update_metadata(app_id, "last_analyzed_date", end_date)
-    update_metadata(app_id, "seagull_analysis_complete", "true")
+    update_metadata_values(app_id, {
+        "last_analyzed_date": end_date,
+        "seagull_analysis_complete": "true",
+    })
 
     print("\n" + "=" * 60)
     print("ANALYSIS COMPLETE")
+    print(f"LLM cache: {llm_cache.stats['hits'] - cache_hits} hits, "
+          f"{llm_cache.stats['misses'] - cache_misses} misses")
     print(f"Analyzed {len(months_to_analyze)} new months (skipped {months_skipped})")
     print(f"Aggregated {len(quarters)} quarters, {len(years)} years")
     print("=" * 60)
@@ -3,16 +3,19 @@ Review scraper — Agent 1's first tool.
 Fetches reviews from Google Play Store and Apple App Store.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Optional
 from google_play_scraper import Sort, reviews, app as gplay_app
+import orjson
 import requests
 
 from app.models import Review, AppInfo
 
 
 def scrape_google_play(app_id: str, count: int = 10000,
-                       since_date: datetime = None, until_date: datetime = None) -> tuple[AppInfo, list[Review]]:
+                       since_date: datetime = None, until_date: datetime = None,
+                       existing_ids: Optional[set[str]] = None) -> tuple[AppInfo, list[Review]]:
     """
     Fetch reviews from Google Play Store.
 
@@ -21,10 +24,16 @@ def scrape_google_play(app_id: str, count: int = 10000,
         count:      Maximum number of reviews to fetch.
         since_date: Only keep reviews on or after this date. Also stops fetching
                     when all reviews in a batch are older than this date (saves API calls).
-        until_date: Only keep reviews on or before this date.
+        until_date: Only keep reviews BEFORE this moment (exclusive). For a period
+                    ending on a given day, pass midnight of the day after, so the
+                    whole last day is kept — the same half-open range the database
+                    queries use (see database._end_bound).
+        existing_ids: Review IDs already in the database (see get_existing_review_ids).
+                    Those reviews are skipped — they'd only be ignored on insert anyway.
+                    They still count towards `count`, so the fetch goes as deep as before.
 
     Returns:
-        A tuple of (app info, list of reviews within the date range).
+        A tuple of (app info, list of new reviews within the date range).
     """
 
     # Step 1: Get app info (name, etc.)
@@ -42,15 +51,18 @@ def scrape_google_play(app_id: str, count: int = 10000,
     continuation_token = None
     batch_number = 0
     hit_date_boundary = False
+    bounds_by_tz = {}  # tzinfo → (since_date, until_date) carrying that tzinfo
+    existing_ids = existing_ids or set()
+    already_stored = 0
 
     date_info = ""
     if since_date:
-        date_info += f" since {since_date.strftime('%Y-%m-%d')}"
+        date_info += f" since {since_date.date().isoformat()}"
     if until_date:
-        date_info += f" until {until_date.strftime('%Y-%m-%d')}"
+        date_info += f" before {until_date.date().isoformat()}"
     print(f"Fetching up to {count} reviews{date_info}...")
 
-    while len(all_reviews) < count and not hit_date_boundary:
+    while len(all_reviews) + already_stored < count and not hit_date_boundary:
         batch_number += 1
 
         result, continuation_token = reviews(
@@ -58,7 +70,7 @@ def scrape_google_play(app_id: str, count: int = 10000,
             lang="en",
             country="us",
             sort=Sort.NEWEST,
-            count=min(200, count - len(all_reviews)),
+            count=min(200, count - len(all_reviews) - already_stored),
             continuation_token=continuation_token
         )
 
@@ -70,20 +82,37 @@ def scrape_google_play(app_id: str, count: int = 10000,
         for raw in result:
             review_date = raw["at"]  # datetime object (may be timezone-aware)
 
-            # Strip timezone info to avoid TypeError when comparing
-            # google-play-scraper returns aware datetimes, our dates are naive
-            if hasattr(review_date, 'tzinfo') and review_date.tzinfo is not None:
-                review_date = review_date.replace(tzinfo=None)
+            # google-play-scraper may return aware datetimes, our bounds are naive.
+            # Rather than stripping the timezone off every review (a new datetime each),
+            # compare against the bounds re-labelled with the review's own tzinfo:
+            # same tzinfo → plain wall-clock comparison, exactly as if both were naive.
+            tz = review_date.tzinfo
+            bounds = bounds_by_tz.get(tz)
+            if bounds is None:
+                bounds = bounds_by_tz[tz] = (
+                    since_date.replace(tzinfo=tz) if since_date else None,
+                    until_date.replace(tzinfo=tz) if until_date else None,
+                )
+            since_bound, until_bound = bounds
 
             # If the review is older than our start date, count it
-            if since_date and review_date < since_date:
+            if since_bound and review_date < since_bound:
                 older_than_range += 1
                 continue
 
-            # If the review is newer than our end date, skip it
-            if until_date and review_date > until_date:
+            # If the review is at or past our (exclusive) end bound, skip it
+            if until_bound and review_date >= until_bound:
+                continue
+
+            # Already in the database — no need to build a Review just to have it ignored
+            if raw["reviewId"] in existing_ids:
+                already_stored += 1
                 continue
 
+            # Only reviews we keep get their timezone stripped
+            if tz is not None:
+                review_date = review_date.replace(tzinfo=None)
+
             review = Review(
                 review_id=raw["reviewId"],
                 source="google_play",
@@ -96,7 +125,7 @@ def scrape_google_play(app_id: str, count: int = 10000,
             )
             all_reviews.append(review)
 
-            if len(all_reviews) >= count:
+            if len(all_reviews) + already_stored >= count:
                 break
 
         print(f"  Batch {batch_number}: fetched {len(result)} reviews, "
@@ -104,19 +133,50 @@ def scrape_google_play(app_id: str, count: int = 10000,
 
         # If most of this batch was older than our range, stop — we've gone past it
         if since_date and older_than_range > len(result) * 0.8:
-            print(f"  Most reviews now older than {since_date.strftime('%Y-%m-%d')}. Stopping.")
+            print(f"  Most reviews now older than {since_date.date().isoformat()}. Stopping.")
             hit_date_boundary = True
 
         if continuation_token is None:
             break
 
-    print(f"Done. Total reviews in date range: {len(all_reviews)}")
-    all_reviews.sort(key=lambda r: r.date)
+    print(f"Done. Total new reviews in date range: {len(all_reviews)} "
+          f"({already_stored} already stored, skipped)")
+    # Fetched newest-first (Sort.NEWEST), batch after batch — reversing gives oldest-first
+    # in O(N) without a sort. (Nothing downstream depends on a strict order: the
+    # database returns reviews ORDER BY date.)
+    all_reviews.reverse()
 
     return app_info, all_reviews
 
 
-def scrape_apple_app_store(app_id: str, app_name: str, count: int = 10000) -> tuple[AppInfo, list[Review]]:
+# Apple's feed has at most 10 pages, all fetched at once
+APPLE_MAX_PAGES = 10
+
+# One shared session for Apple's feed: it keeps connections to itunes.apple.com open
+# between requests (and between scrapes), so pages after the first skip the TCP/TLS
+# handshake. The pool is sized so every parallel page fetch gets its own connection.
+# (HTTP/2 could multiplex the pages over a single connection, but would mean swapping
+# requests for httpx plus the h2 package — for at most 10 pages a warm pool is enough.)
+_apple_session = requests.Session()
+_apple_session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=APPLE_MAX_PAGES),
+)
+
+
+def _fetch_apple_page(url: str) -> tuple[Optional[dict], Optional[Exception]]:
+    """Fetch one page of Apple's RSS feed. Returns (json, None) or (None, error)."""
+    try:
+        response = _apple_session.get(url, timeout=10)
+        response.raise_for_status()  # Raises exception if HTTP error (404, 500, etc.)
+        # orjson parses the raw bytes directly — several times faster than response.json()
+        return orjson.loads(response.content), None
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
+        return None, e
+
+
+def scrape_apple_app_store(app_id: str, app_name: str, count: int = 10000,
+                           existing_ids: Optional[set[str]] = None) -> tuple[AppInfo, list[Review]]:
     """
     Fetch reviews from Apple App Store using the public iTunes RSS API.
 
@@ -124,6 +184,7 @@ def scrape_apple_app_store(app_id: str, app_name: str, count: int = 10000) -> tu
         app_id:   The numeric app ID (found in the App Store URL).
         app_name: The app name (Apple API doesn't always return this).
         count:    Maximum number of reviews to fetch.
+        existing_ids: Review IDs already in the database — those reviews are skipped.
 
     Note:
         Apple's public RSS API only returns the most recent ~500 reviews.
@@ -140,19 +201,24 @@ def scrape_apple_app_store(app_id: str, app_name: str, count: int = 10000) -> tu
 
     all_reviews = []
     # Apple's RSS feed gives 50 reviews per page, up to 10 pages
-    max_pages = min(10, (count // 50) + 1)
+    max_pages = min(APPLE_MAX_PAGES, (count // 50) + 1)
 
     print(f"Fetching Apple App Store reviews for: {app_name} (ID: {app_id})")
 
-    for page in range(1, max_pages + 1):
-        url = f"https://itunes.apple.com/us/rss/customerreviews/id={app_id}/page={page}/sortby=mostrecent/json"
-
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()  # Raises exception if HTTP error (404, 500, etc.)
-            data = response.json()
-        except requests.RequestException as e:
-            print(f"  Error fetching page {page}: {e}")
+    # Request all pages at once — each one is a separate, slow network round trip,
+    # so waiting on them in parallel instead of one after another cuts the wall time.
+    # Results are still processed in page order below, stopping at the first failed
+    # or empty page just like a sequential crawl would.
+    urls = [
+        f"https://itunes.apple.com/us/rss/customerreviews/id={app_id}/page={page}/sortby=mostrecent/json"
+        for page in range(1, max_pages + 1)
+    ]
+    with ThreadPoolExecutor(max_workers=max_pages) as pool:
+        pages = list(pool.map(_fetch_apple_page, urls))
+
+    for page, (data, error) in enumerate(pages, start=1):
+        if error is not None:
+            print(f"  Error fetching page {page}: {error}")
             break
 
         # Navigate the nested JSON structure Apple returns
@@ -165,16 +231,21 @@ def scrape_apple_app_store(app_id: str, app_name: str, count: int = 10000) -> tu
             if "im:rating" not in entry:
                 continue
 
+            # Skip reviews already in the database
+            if existing_ids and entry.get("id", {}).get("label") in existing_ids:
+                continue
+
+            # "2025-06-30T07:12:45-07:00" → the day only, as a midnight datetime.
+            # fromisoformat is a C fast path for this fixed "YYYY-MM-DD" shape — no
+            # format string to interpret per review, unlike strptime.
+            updated = entry.get("updated", {}).get("label")
             review = Review(
                 review_id=entry.get("id", {}).get("label", f"apple_{page}_{len(all_reviews)}"),
                 source="apple_app_store",
                 app_id=app_id,
                 rating=int(entry.get("im:rating", {}).get("label", 0)),
                 text=entry.get("content", {}).get("label"),
-                date=datetime.strptime(
-                    entry.get("updated", {}).get("label", "")[:10],
-                    "%Y-%m-%d"
-                ) if entry.get("updated", {}).get("label") else datetime.now(),
+                date=datetime.fromisoformat(updated[:10]) if updated else datetime.now(),
                 username=entry.get("author", {}).get("name", {}).get("label", "Anonymous"),
                 thumbs_up=int(entry.get("im:voteSum", {}).get("label", 0))
             )
@@ -183,7 +254,7 @@ def scrape_apple_app_store(app_id: str, app_name: str, count: int = 10000) -> tu
         print(f"  Page {page}: fetched {len(entries)} entries (total reviews: {len(all_reviews)})")
 
     print(f"Done. Total Apple reviews fetched: {len(all_reviews)}")
-    all_reviews.sort(key=lambda r: r.date)
+    all_reviews.reverse()  # Pages are sortby=mostrecent — reversed, oldest first (see scrape_google_play)
 
     return app_info, all_reviews
 
@@ -0,0 +1,78 @@
+"""
+Local theme clustering — an optional shortcut for very large months.
+
+The normal path sends up to THEME_BATCH_SIZE reviews to the LLM and lets it find
+the themes. For a month with thousands of text reviews that's a sample, not the
+whole picture. Here the grouping happens locally instead:
+
+    1. Embed every review with a small sentence-transformer model (text → vector).
+    2. Cluster the vectors with HDBSCAN — reviews about the same topic land close together.
+    3. The LLM only names each cluster, from a handful of representative reviews.
+
+Mention counts are then real cluster sizes over the whole month, and the LLM call
+is small no matter how many reviews there are.
+
+Optional: needs `sentence-transformers` and `hdbscan`, which are NOT in the default
+requirements (they pull in PyTorch). Turn it on with THEME_CLUSTERING=true in .env;
+without the packages the processor quietly keeps using the LLM-only path.
+"""
+
+from functools import lru_cache
+
+# Small, fast English model — good enough to tell "app crashes" from "too many ads"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Reviews shown to the LLM per cluster
+REPRESENTATIVES_PER_CLUSTER = 5
+
+
+def is_available() -> bool:
+    """True if the optional clustering packages are installed."""
+    try:
+        import hdbscan  # noqa: F401
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=1)
+def _get_model():
+    """Load the embedding model once per process (loading takes seconds)."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def cluster_texts(texts: list[str]) -> list[list[int]]:
+    """
+    Group review texts by topic.
+
+    Returns one list of indexes (into `texts`) per cluster, largest cluster first,
+    each ordered most-representative first — the reviews closest to the
+    cluster's centre. Reviews that fit no cluster (HDBSCAN "noise") are left out.
+    """
+    import hdbscan
+    import numpy as np
+
+    # Normalized vectors: a dot product is then the cosine similarity
+    embeddings = _get_model().encode(
+        texts, batch_size=64, show_progress_bar=False,
+        convert_to_numpy=True, normalize_embeddings=True,
+    )
+
+    # Minimum cluster size grows with the month, so big months don't splinter into
+    # hundreds of tiny clusters
+    clusterer = hdbscan.HDBSCAN(min_cluster_size=max(5, len(texts) // 200))
+    labels = clusterer.fit_predict(embeddings)
+
+    clusters = []
+    for label in np.unique(labels):
+        if label == -1:
+            continue  # Noise
+        members = np.flatnonzero(labels == label)
+        centroid = embeddings[members].mean(axis=0)
+        closeness = embeddings[members] @ centroid
+        clusters.append(members[np.argsort(-closeness)].tolist())
+
+    clusters.sort(key=len, reverse=True)
+    return clusters